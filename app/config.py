@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import ValidationError
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 ROOT_DIR = Path(__file__).parent.parent
 
@@ -19,6 +19,37 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
+    HOLD_EXPIRY_HOURS: int = 72
+    HOLD_EXPIRY_CHECK_SECONDS: int = 300
+    MAX_ACTIVE_LOANS_USER: int = 5
+    MAX_ACTIVE_LOANS_LIBRARIAN: int = 10
+    MAX_ACTIVE_LOANS_ADMIN: int = 10
+    MAX_OVERDUE_LOANS: int = 0
+    BORROWINGS_PARTITION_MONTHS_AHEAD: int = 3
+    BORROWINGS_PARTITION_CHECK_SECONDS: int = 3600
+    BORROWINGS_ARCHIVE_AFTER_MONTHS: int = 12
+    HASHING_MAX_WORKERS: int = 4
+    HASHING_MAX_QUEUE: int = 64
+    PASSWORD_HASH_ALGORITHM: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    API_KEY_HMAC_SECRET: Optional[str] = None
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+    LOGIN_FREE_ATTEMPTS: int = 3
+    LOGIN_LOCKOUT_ATTEMPTS: int = 10
+    LOGIN_IP_FREE_ATTEMPTS: int = 20
+    LOGIN_IP_LOCKOUT_ATTEMPTS: int = 100
+    LOGIN_BACKOFF_BASE_SECONDS: int = 1
+    LOGIN_BACKOFF_MAX_SECONDS: int = 300
+    LOGIN_LOCKOUT_SECONDS: int = 900
+    JWT_KEYS_DIR: str = os.path.join(ROOT_DIR, "keys", "jwt")
+    JWT_KEYS_RELOAD_SECONDS: int = 60
+    JWT_ACCEPT_SECRET_KEY_TOKENS: bool = True
+    JWT_GENERATE_SIGNING_KEY: bool = False
 
     class Config:
         env_file = os.path.join(ROOT_DIR, ".env")
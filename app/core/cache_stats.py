@@ -0,0 +1,37 @@
+import threading
+from typing import Dict
+
+
+class CacheStats:
+    """
+        In-process hit/miss counters for a cache. Numbers are per worker process,
+        which is enough to watch the hit ratio and hit latency of one instance.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__hit_seconds = 0.0
+
+    def record_hit(self, seconds: float) -> None:
+        with self.__lock:
+            self.__hits += 1
+            self.__hit_seconds += seconds
+
+    def record_miss(self) -> None:
+        with self.__lock:
+            self.__misses += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.__lock:
+            hits, misses, hit_seconds = self.__hits, self.__misses, self.__hit_seconds
+        lookups = hits + misses
+        return {
+            "name": self.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "avg_hit_latency_ms": hit_seconds / hits * 1000 if hits else 0.0,
+        }
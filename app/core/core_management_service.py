@@ -1,19 +1,23 @@
 from datetime import datetime
 
-import bcrypt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from typing import List, Optional
 
+from app.core.password_hasher import password_hasher
+from app.core.role_registry import role_registry
+from app.security.token_revocation import token_revocations
 from app.models.user import User
-from app.models.role import Role
 
 from app.schemas.user import UserUpdate, UserPasswordUpdate, UserInDB, PasswordUpdate, UserCreate, UserResponse
+from app.services.refresh_token_service import RefreshTokenService
 from app.services.user_api_key_service import UserApiKeyService
+from app.utils.common_utils import create_access_token
 
 from abc import ABC
 
-from app.utils.constants import LIBRARIAN_ACCESS_LEVEL
+from app.utils.constants import LIBRARIAN_ACCESS_LEVEL, USER_ACCESS_LEVEL
 
 
 class CoreManagementService(ABC):
@@ -71,13 +75,13 @@ class CoreManagementService(ABC):
         user_response = UserInDB.model_validate(db_user)
         return user_response
 
-    def update_password(self, user_id: int, password_update: UserPasswordUpdate|PasswordUpdate, forgot_password:bool=False, user_email:str=None) -> str:
+    async def update_password(self, user_id: int, password_update: UserPasswordUpdate|PasswordUpdate, forgot_password:bool=False, user_email:str=None) -> str:
 
         if forgot_password:
             db_user = self.get_user_by_email(user_email)
         else:
             db_user = self.get_user_by_id(user_id)
-            if not self.verify_password(password_update.current_password, db_user.password):
+            if not await self.verify_password(password_update.current_password, db_user.password):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Incorrect current password"
@@ -89,10 +93,14 @@ class CoreManagementService(ABC):
                 detail="User not found"
             )
 
-        hashed_password = self.get_password_hash(password_update.new_password)
+        hashed_password = await self.get_password_hash(password_update.new_password)
         db_user.password = hashed_password
+        user_id = db_user.user_id
 
         self.db.commit()
+        # sessions opened with the old password end, access and refresh tokens alike
+        token_revocations.revoke_user(user_id)
+        RefreshTokenService().revoke_user(user_id)
         self.db.refresh(db_user)
         return "password updated successfully"
 
@@ -107,7 +115,7 @@ class CoreManagementService(ABC):
     def reassign_role(self, user_id: int, access_level: int) -> User:
         db_user = self.get_user_by_id(user_id)
 
-        role = self.db.query(Role).filter(Role.access_level == access_level).first()
+        role = role_registry.by_access_level(access_level)
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -116,34 +124,37 @@ class CoreManagementService(ABC):
 
         db_user.role_id=role.role_id
         self.db.commit()
+        # issued tokens carry the old role claim
+        token_revocations.revoke_user(user_id)
+        RefreshTokenService().revoke_user(user_id)
         self.db.refresh(db_user)
         return db_user
 
     def remove_role(self, user_id: int, role_name: str) -> User:
         db_user = self.get_user_by_id(user_id)
 
-        role = self.db.query(Role).filter(Role.role_name == role_name).first()
+        role = role_registry.by_name(role_name)
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Role '{role_name}' not found"
             )
 
-        if role not in db_user.roles:
+        if db_user.role_id != role.role_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"User doesn't have role '{role_name}'"
             )
 
-        db_user.roles.remove(role)
-        self.db.commit()
-        self.db.refresh(db_user)
-        return db_user
+        # a user holds exactly one role, so removing it falls back to the base user role
+        return self.reassign_role(user_id, USER_ACCESS_LEVEL)
 
     def deactivate(self, user_id: int) -> User:
         db_user = self.get_user_by_id(user_id)
         db_user.is_active = False
         self.db.commit()
+        token_revocations.revoke_user(user_id)
+        RefreshTokenService().revoke_user(user_id)
         self.db.refresh(db_user)
         return db_user
 
@@ -155,9 +166,19 @@ class CoreManagementService(ABC):
         self.db.refresh(db_user)
         return db_user
 
+    @staticmethod
+    def ensure_active(user: User) -> None:
+        """Deactivated accounts get no new tokens, whatever credentials they present."""
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User account is deactivated"
+            )
+
     @staticmethod
     def has_role(user: User, role_name: str) -> bool:
-        return any(role.role_name == role_name for role in user.roles)
+        role = role_registry.by_id(user.role_id)
+        return role is not None and role.role_name == role_name
 
     def create_token_data(self,user: User) -> dict:
         return {
@@ -166,37 +187,43 @@ class CoreManagementService(ABC):
             "username": user.username,
             "user_id": user.user_id,
             "email": user.email,
-            "role": user.role.access_level,
+            "role": role_registry.by_id(user.role_id).access_level,
         }
 
-    def get_password_hash(self, password: str) -> str:
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        hash = bcrypt.hashpw(password_bytes, salt)
-        return hash.decode('utf-8')
+    def issue_tokens(self, user: User, token_data: dict) -> dict:
+        """Access token for a successful login, plus the refresh token that renews it."""
+        access_token, expires_in = create_access_token(token_data)
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": expires_in.__str__(),
+            "refresh_token": RefreshTokenService().issue(user.user_id, token_data)
+        }
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        user_bytes = plain_password.encode('utf-8')
-        result = bcrypt.checkpw(user_bytes, hashed_password.encode('utf-8'))
-        return result
+    async def get_password_hash(self, password: str) -> str:
+        return await password_hasher.hash_async(password)
 
-    def create_user(self, user_create: UserCreate, access_level:int) -> User:
-        db_user = self.get_user_by_username(user_create.username)
-        if db_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already registered"
-            )
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify_async(plain_password, hashed_password)
 
-        db_user = self.get_user_by_email(user_create.email)
-        if db_user:
+    async def rehash_password_if_needed(self, user: User, plain_password: str) -> None:
+        """
+            Called after a successful login: upgrades the stored hash when the configured
+            algorithm or cost has changed since it was made.
+        """
+        if password_hasher.needs_rehash(user.password):
+            user.password = await self.get_password_hash(plain_password)
+            self.db.commit()
+
+    async def build_user(self, user_create: UserCreate, access_level:int) -> User:
+        user_role = role_registry.by_access_level(access_level)
+        if not user_role:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Role with access level '{access_level}' not found"
             )
 
-        hashed_password = self.get_password_hash(user_create.password)
-        user_role = self.db.query(Role).filter(Role.access_level == access_level).first()
+        hashed_password = await self.get_password_hash(user_create.password)
         db_user = User(
             username=user_create.username,
             email=user_create.email,
@@ -207,8 +234,38 @@ class CoreManagementService(ABC):
             is_active=True,
             role_id=user_role.role_id
         )
+        return db_user
 
+    def insert_user(self, db_user: User) -> None:
+        """
+            Flushes a new user (and anything attached to it) without committing. Uniqueness is
+            left to the users table's unique indexes instead of looking names up first.
+        """
         self.db.add(db_user)
+        try:
+            self.db.flush()
+        except IntegrityError as e:
+            self.db.rollback()
+            field = self._duplicate_user_field(e)
+            if field is None:
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{field.capitalize()} already registered"
+            )
+
+    @staticmethod
+    def _duplicate_user_field(error: IntegrityError) -> Optional[str]:
+        constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None) or ""
+        message = str(error.orig)
+        for field in ("username", "email"):
+            # postgres names the violated index; sqlite only says "UNIQUE constraint failed: users.<column>"
+            if constraint == f"ix_users_{field}" or f"users.{field}" in message:
+                return field
+        return None
+
+    async def create_user(self, user_create: UserCreate, access_level:int) -> User:
+        db_user = await self.build_user(user_create=user_create, access_level=access_level)
+        self.insert_user(db_user)
         self.db.commit()
-        self.db.refresh(db_user)
         return db_user
\ No newline at end of file
@@ -1,8 +1,9 @@
 import traceback
 
-import bcrypt
 from sqlalchemy.exc import SQLAlchemyError
 import logging
+from app.core.password_hasher import password_hasher
+from app.core.role_registry import role_registry
 from app.database import SessionLocal
 from app.models.user import User
 from app.models.role import Role
@@ -34,6 +35,7 @@ async def create_admin_user():
                 db.commit()
             else:
                 logger.info(f"Role {role_name} already present")
+        role_registry.load(db)
 
         # Check if admin user exists
         admin_username = settings.ADMIN_USERNAME
@@ -41,7 +43,7 @@ async def create_admin_user():
 
         if not admin_user:
 
-            admin_role = db.query(Role).filter(Role.access_level == ADMIN_ACCESS_LEVEL).first()
+            admin_role = role_registry.by_access_level(ADMIN_ACCESS_LEVEL)
 
             if not admin_role:
                 logger.error("Admin role not found. Cannot create admin user.")
@@ -49,11 +51,7 @@ async def create_admin_user():
 
             logger.info(f"Creating Admin user",)
 
-            password=settings.ADMIN_INITIAL_PASSWORD
-            password_bytes = password.encode('utf-8')
-            salt = bcrypt.gensalt()
-            hash = bcrypt.hashpw(password_bytes, salt)
-            hashed_pwd=hash.decode('utf-8')
+            hashed_pwd = await password_hasher.hash_async(settings.ADMIN_INITIAL_PASSWORD)
             admin_user = User(
                 username=admin_username,
                 email=settings.ADMIN_EMAIL,
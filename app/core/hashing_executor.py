@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+
+
+class HashingExecutor:
+    """
+        Runs password and key hashing on a small dedicated thread pool, so it never
+        runs on the event loop and never takes more than max_workers cores.
+
+        At most max_workers + max_queue jobs may be pending; anything beyond that is rejected
+        straight away with a 503, so a login burst sheds load instead of queueing forever.
+        A slot is given back when its future is done, including when it is cancelled while queued.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hashing")
+        self.__slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.__lock = threading.Lock()
+        self.__submitted = 0
+        self.__completed = 0
+        self.__rejected = 0
+        self.__pending = 0
+        self.__running = 0
+        self.__wait_seconds = 0.0
+        self.__run_seconds = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self.__slots.acquire(blocking=False):
+            with self.__lock:
+                self.__rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        with self.__lock:
+            self.__submitted += 1
+            self.__pending += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            with self.__lock:
+                self.__pending -= 1
+                self.__running += 1
+                self.__wait_seconds += started_at - queued_at
+            try:
+                return fn(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self.__lock:
+                    self.__running -= 1
+                    self.__completed += 1
+                    self.__run_seconds += finished_at - started_at
+
+        def release(future: Future) -> None:
+            # a job cancelled while queued (its request went away) never runs job()
+            if future.cancelled():
+                with self.__lock:
+                    self.__pending -= 1
+            self.__slots.release()
+
+        future = self.__executor.submit(job)
+        future.add_done_callback(release)
+        return future
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.__lock:
+            completed = self.__completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "submitted": self.__submitted,
+                "completed": completed,
+                "rejected": self.__rejected,
+                "queued": self.__pending,
+                "running": self.__running,
+                "avg_wait_ms": self.__wait_seconds / completed * 1000 if completed else 0.0,
+                "avg_run_ms": self.__run_seconds / completed * 1000 if completed else 0.0,
+            }
+
+
+hashing_executor = HashingExecutor(settings.HASHING_MAX_WORKERS, settings.HASHING_MAX_QUEUE)
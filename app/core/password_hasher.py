@@ -0,0 +1,84 @@
+import re
+from typing import Optional
+
+import bcrypt
+
+from app.config import settings
+from app.core.hashing_executor import hashing_executor
+
+try:
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:
+    Argon2Hasher = None
+
+BCRYPT = "bcrypt"
+ARGON2ID = "argon2id"
+
+_BCRYPT_PREFIX = re.compile(r"^\$2[aby]\$(\d{2})\$")
+
+
+class PasswordHasher:
+    """
+        Single place that knows how secrets are hashed. The algorithm and its cost come from
+        settings; verify() understands every supported format, so stored hashes keep working
+        after a change and needs_rehash() tells callers when to upgrade one.
+
+        All hashing runs on the bounded hashing executor.
+    """
+
+    def __init__(self, algorithm: str = BCRYPT, bcrypt_rounds: int = 12, argon2_time_cost: int = 3,
+                 argon2_memory_cost: int = 65536, argon2_parallelism: int = 4):
+        if algorithm not in (BCRYPT, ARGON2ID):
+            raise ValueError(f"Unsupported password hash algorithm: {algorithm}")
+        if algorithm == ARGON2ID and Argon2Hasher is None:
+            raise RuntimeError("argon2id hashing needs the argon2-cffi package")
+
+        self.algorithm = algorithm
+        self.bcrypt_rounds = bcrypt_rounds
+        self.__argon2: Optional["Argon2Hasher"] = None
+        if Argon2Hasher is not None:
+            self.__argon2 = Argon2Hasher(time_cost=argon2_time_cost, memory_cost=argon2_memory_cost,
+                                         parallelism=argon2_parallelism)
+
+    @classmethod
+    def from_settings(cls) -> "PasswordHasher":
+        return cls(
+            algorithm=settings.PASSWORD_HASH_ALGORITHM,
+            bcrypt_rounds=settings.BCRYPT_ROUNDS,
+            argon2_time_cost=settings.ARGON2_TIME_COST,
+            argon2_memory_cost=settings.ARGON2_MEMORY_COST,
+            argon2_parallelism=settings.ARGON2_PARALLELISM,
+        )
+
+    def _hash(self, secret: str) -> str:
+        if self.algorithm == ARGON2ID:
+            return self.__argon2.hash(secret)
+        return bcrypt.hashpw(secret.encode('utf-8'), bcrypt.gensalt(rounds=self.bcrypt_rounds)).decode('utf-8')
+
+    def _verify(self, secret: str, hashed: str) -> bool:
+        if hashed.startswith("$argon2"):
+            if self.__argon2 is None:
+                return False
+            try:
+                return self.__argon2.verify(hashed, secret)
+            except (VerificationError, InvalidHashError):
+                return False
+        return bcrypt.checkpw(secret.encode('utf-8'), hashed.encode('utf-8'))
+
+    async def hash_async(self, secret: str) -> str:
+        return await hashing_executor.run_async(self._hash, secret)
+
+    async def verify_async(self, secret: str, hashed: str) -> bool:
+        return await hashing_executor.run_async(self._verify, secret, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when hashed was made with another algorithm or other cost parameters."""
+        if self.algorithm == ARGON2ID:
+            return not hashed.startswith("$argon2id$") or self.__argon2.check_needs_rehash(hashed)
+
+        match = _BCRYPT_PREFIX.match(hashed)
+        return match is None or int(match.group(1)) != self.bcrypt_rounds
+
+
+password_hasher = PasswordHasher.from_settings()
@@ -3,17 +3,17 @@ from typing import Any, Optional
 import redis
 from app.config import settings
 
+# one pool per decoding mode, shared by every service instance in the worker
+_text_pool = redis.ConnectionPool(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0, decode_responses=True)
+_bytes_pool = redis.ConnectionPool(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
+
 
 class RedisCacheService:
 
     def __init__(self, default_ttl: int = 3600):
 
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=0,
-            decode_responses=True
-        )
+        self.redis_client = redis.Redis(connection_pool=_text_pool)
+        self.raw_redis_client = redis.Redis(connection_pool=_bytes_pool)
         self.default_ttl = default_ttl
 
     def get(self, key: str) -> Optional[Any]:
@@ -25,6 +25,9 @@ class RedisCacheService:
                 return value
         return None
 
+    def get_raw(self, key: str) -> Optional[bytes]:
+        return self.raw_redis_client.get(key)
+
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         if ttl is None:
             ttl = self.default_ttl
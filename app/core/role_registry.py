@@ -0,0 +1,74 @@
+import logging
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.role import Role
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_ROLE_RELOAD_SECONDS = 30
+
+
+class RoleInfo(NamedTuple):
+    role_id: int
+    role_name: str
+    access_level: int
+    description: Optional[str]
+
+
+class RoleRegistry:
+    """
+        In-process copy of the roles table, so resolving a role by id, access level or name
+        never touches the database. It is loaded in lifespan right after the roles are seeded
+        and reloaded by whatever changes them. A lookup that finds nothing reloads it at most
+        every UNKNOWN_ROLE_RELOAD_SECONDS, which picks up roles added by another process.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__roles: Tuple[Dict[int, RoleInfo], Dict[int, RoleInfo], Dict[str, RoleInfo]] = ({}, {}, {})
+        self.__loaded_at: Optional[float] = None
+
+    def load(self, db: Optional[Session] = None) -> None:
+        session = db or SessionLocal()
+        try:
+            roles = [
+                RoleInfo(role.role_id, role.role_name, role.access_level, role.description)
+                for role in session.query(Role).all()
+            ]
+        finally:
+            if db is None:
+                session.close()
+
+        with self.__lock:
+            self.__roles = (
+                {role.role_id: role for role in roles},
+                {role.access_level: role for role in roles},
+                {role.role_name: role for role in roles},
+            )
+            self.__loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(roles)} roles")
+
+    def by_id(self, role_id: int) -> Optional[RoleInfo]:
+        return self._lookup(0, role_id)
+
+    def by_access_level(self, access_level: int) -> Optional[RoleInfo]:
+        return self._lookup(1, access_level)
+
+    def by_name(self, role_name: str) -> Optional[RoleInfo]:
+        return self._lookup(2, role_name)
+
+    def _lookup(self, index: int, key) -> Optional[RoleInfo]:
+        role = self.__roles[index].get(key)
+        if role is None and (self.__loaded_at is None
+                             or time.monotonic() - self.__loaded_at > UNKNOWN_ROLE_RELOAD_SECONDS):
+            self.load()
+            role = self.__roles[index].get(key)
+        return role
+
+
+role_registry = RoleRegistry()
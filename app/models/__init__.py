@@ -3,4 +3,5 @@ from .role import *
 from .category import *
 from .book import *
 from .borrowing import *
-from .api_key import *
\ No newline at end of file
+from .api_key import *
+from .books_queue import *
\ No newline at end of file
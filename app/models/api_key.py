@@ -1,19 +1,33 @@
+import hashlib
+import hmac
 import secrets
+from typing import Optional
 
-import bcrypt
 from sqlalchemy import Integer, Column, ForeignKey, String, DateTime, func, Boolean
 from sqlalchemy.orm import relationship
 
+from app.config import settings
+from app.core.password_hasher import password_hasher
 from app.database import Base
 
+API_KEY_PREFIX = "lk1"
+KEY_HASH_SCHEME = "hmac-sha256$"
+
 
 class UserApiKey(Base):
+    """
+        Keys look like lk1_<key_id>_<secret>. key_id is stored in clear for direct lookup and
+        key_hash is an HMAC-SHA256 of the whole key, so verification is a constant-time digest
+        comparison instead of a KDF. Keys issued before this format (bare secret, bcrypt hash)
+        are still accepted and their hash is converted to HMAC on next use.
+    """
 
     __tablename__ = "user_keys"
 
 
     api_key_id=Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    key_id = Column(String(32), unique=True, index=True, nullable=True)
     key_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     last_used_at = Column(DateTime, nullable=True)
@@ -25,17 +39,26 @@ class UserApiKey(Base):
 
     @staticmethod
     def generate_api_key():
-        return secrets.token_urlsafe(32)
+        return f"{API_KEY_PREFIX}_{secrets.token_hex(8)}_{secrets.token_urlsafe(32)}"
+
+    @staticmethod
+    def parse_key_id(api_key) -> Optional[str]:
+        parts = api_key.split("_", 2)
+        if len(parts) == 3 and parts[0] == API_KEY_PREFIX:
+            return parts[1]
+        return None
 
     @staticmethod
     def hash_key(api_key):
-        key_bytes = api_key.encode('utf-8')
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(key_bytes, salt)
-        return hashed.decode('utf-8')
+        secret = (settings.API_KEY_HMAC_SECRET or settings.SECRET_KEY).encode('utf-8')
+        return KEY_HASH_SCHEME + hmac.new(secret, api_key.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def is_legacy_hash(hashed_key) -> bool:
+        return not hashed_key.startswith(KEY_HASH_SCHEME)
 
     @staticmethod
-    def verify_key(api_key, hashed_key):
-        key_bytes = api_key.encode('utf-8')
-        hashed_bytes = hashed_key.encode('utf-8')
-        return bcrypt.checkpw(key_bytes, hashed_bytes)
\ No newline at end of file
+    async def verify_key_async(api_key, hashed_key):
+        if UserApiKey.is_legacy_hash(hashed_key):
+            return await password_hasher.verify_async(api_key, hashed_key)
+        return hmac.compare_digest(UserApiKey.hash_key(api_key), hashed_key)
@@ -61,6 +61,7 @@ class Book(Base):
     description = Column(Text)
     total_copies = Column(Integer, default=1)
     available_copies = Column(Integer, default=1)
+    total_loans = Column(Integer, default=0, server_default="0", nullable=False)
     added_date = Column(DateTime, default=datetime.utcnow)
     category_id = Column(Integer, ForeignKey("categories.category_id"), index=True)
 
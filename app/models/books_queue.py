@@ -12,14 +12,21 @@ class BookRequestQueue(Base):
     book_id = Column(Integer, ForeignKey("books.book_id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     request_date = Column(DateTime, default=func.now(), nullable=False)
-    status = Column(String, default="PENDING", nullable=False)  # PENDING, FULFILLED, CANCELLED
+    status = Column(String, default="PENDING", nullable=False)  # PENDING, RESERVED, FULFILLED, EXPIRED, CANCELLED
     notification_sent = Column(Boolean, default=False)
+    reserved_at = Column(DateTime, nullable=True)
+    hold_expires_at = Column(DateTime, nullable=True)
 
     # Relationships
     book = relationship("Book", back_populates="request_queue")
     user = relationship("User", back_populates="book_requests")
 
-    # Create an index for fast queue retrieval by book_id and status
+    # Create an index for fast queue retrieval by book_id and status,
+    # one for sweeping reserved holds that have run past their expiry
+    # and a partial unique index so a user can only be pending once per book
     __table_args__ = (
         Index('idx_book_status_date', book_id, status, request_date),
+        Index('idx_status_hold_expires', status, hold_expires_at),
+        Index('uq_pending_user_book', user_id, book_id, unique=True,
+              postgresql_where=(status == 'PENDING')),
     )
\ No newline at end of file
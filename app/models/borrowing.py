@@ -1,19 +1,21 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, Sequence, Index, column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.utils.constants import ACTIVE_BORROWING_STATUSES
 
 
 class Borrowing(Base):
     __tablename__ = "borrowings"
 
-    borrowing_id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), index=True)
+    # borrow_date is part of the key because the table is range-partitioned on it
+    borrowing_id = Column(Integer, Sequence("borrowings_borrowing_id_seq"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"))
     book_id = Column(Integer, ForeignKey("books.book_id", ondelete="CASCADE"), index=True)
-    borrow_date = Column(DateTime, default=func.now())
+    borrow_date = Column(DateTime, primary_key=True, default=func.now())
     due_date = Column(DateTime, nullable=False)
     return_date = Column(DateTime, nullable=True)
-    status = Column(String(20), default="borrowed", index=True)  # 'borrowed', 'returned', 'overdue'
+    status = Column(String(20), default="borrowed")  # 'borrowed', 'returned', 'overdue'
 
     #relationships
     user = relationship("User", back_populates="borrowings")
@@ -23,7 +25,31 @@ class Borrowing(Base):
     __table_args__ = (
         CheckConstraint('return_date IS NULL OR return_date >= borrow_date',
                         name='valid_return_date'),
+        # duplicate-loan check in borrow_book: (user_id, book_id) among active loans only
+        Index('ix_borrowings_active_user_book', 'user_id', 'book_id',
+              postgresql_where=column('status').in_(ACTIVE_BORROWING_STATUSES)),
+        # get_user_borrowings: (user_id, status) ordered by due_date; also covers user_id lookups
+        Index('ix_borrowings_user_status_due', 'user_id', 'status', 'due_date'),
+        # overdue sweeps and listings: (status, due_date); also covers status lookups
+        Index('ix_borrowings_status_due', 'status', 'due_date'),
+        {"postgresql_partition_by": "RANGE (borrow_date)"},
     )
 
     def __repr__(self):
-        return f"<Borrowing {self.borrowing_id}>"
\ No newline at end of file
+        return f"<Borrowing {self.borrowing_id}>"
+
+class BorrowingArchive(Base):
+    """Returned loans moved out of borrowings; only indexed for history lookups."""
+    __tablename__ = "borrowings_archive"
+
+    borrowing_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, index=True)
+    book_id = Column(Integer, index=True)
+    borrow_date = Column(DateTime, nullable=False)
+    due_date = Column(DateTime, nullable=False)
+    return_date = Column(DateTime, nullable=False)
+    status = Column(String(20), nullable=False)
+    archived_at = Column(DateTime, default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<BorrowingArchive {self.borrowing_id}>"
@@ -14,6 +14,7 @@ class User(Base):
     last_name = Column(String(50), nullable=False)
     date_joined = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
+    active_loans = Column(Integer, default=0, server_default="0", nullable=False)
 
     # Foreign key to role - single role per user
     role_id = Column(Integer, ForeignKey("roles.role_id"))
@@ -1,13 +1,16 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.generic import GenericResponse
+from app.core.hashing_executor import hashing_executor
+from app.schemas.generic import GenericResponse, HashingStatsResponse, CacheStatsResponse
 from app.schemas.librarian import LibrarianCreate
 from app.schemas.paginated_response import PaginatedResponse
 from app.schemas.user import UserCreate, UserToken, UserResponse, UserInDB
 from app.security.access_level_middleware import require_role
+from app.security.jwt_keys import jwt_key_ring
+from app.security.token_cache import token_cache
 from app.services.admin_services import AdminServices
 from app.utils.constants import ADMIN_ACCESS_LEVEL
 
@@ -18,7 +21,7 @@ router = APIRouter()
 async def register_user(user_data:UserCreate, db: Session = Depends(get_db),
                current_user:UserToken= Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))):
     user_service=AdminServices(db)
-    results=user_service.add_staff(user_data=user_data)
+    results=await user_service.add_staff(user_data=user_data)
     """
         Once staff is registered we can further logic where creds are sent to staff email for staff access
     """
@@ -26,7 +29,7 @@ async def register_user(user_data:UserCreate, db: Session = Depends(get_db),
 
 
 @router.put("/staff/{user_id}/deactivate", response_model=GenericResponse)
-async def deactivate_staff(user_id: int = Path(..., description="ID of the staff member to deactivate"),
+def deactivate_staff(user_id: int = Path(..., description="ID of the staff member to deactivate"),
                   db: Session = Depends(get_db),
                   current_user: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))):
     user_service = AdminServices(db)
@@ -80,6 +83,21 @@ async def retrieve_user(
     user_service=AdminServices(db=db)
     return user_service.retrieve_user(user_id=user_id)
 
+@router.get("/hashing/stats", response_model=HashingStatsResponse)
+async def get_hashing_stats(_: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))):
+    return hashing_executor.snapshot()
+
+@router.get("/token-cache/stats", response_model=CacheStatsResponse)
+async def get_token_cache_stats(_: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))):
+    return token_cache.stats.snapshot()
+
+@router.post("/jwt/rotate", response_model=GenericResponse)
+def rotate_jwt_signing_key(_: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))):
+    if not jwt_key_ring.asymmetric:
+        raise HTTPException(status_code=400, detail="Tokens are signed with SECRET_KEY; set ALGORITHM to EdDSA or ES256 to use signing keys")
+    kid = jwt_key_ring.rotate()
+    return GenericResponse(message=f"Signing key {kid} is now active")
+
 @router.get("/me", response_model=UserToken)
 async def retrieve_user(current_user: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))):
 
@@ -1,27 +1,35 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from slowapi.util import get_remote_address
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.generic import GenericResponse
 from app.schemas.user import PasswordUpdate
 from app.services.staff_auth_service import StaffService
 from app.schemas.auth import LoginCredentials
-from app.schemas.token import Token
+from app.schemas.token import Token, RefreshToken
 from app.core.core_management_service import CoreManagementService
+from app.services.refresh_token_service import RefreshTokenService
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-async def login_user(user_data:LoginCredentials, db: Session = Depends(get_db)):
+async def login_user(request: Request, user_data:LoginCredentials, db: Session = Depends(get_db)):
     user_service=StaffService(db)
-    results=user_service.staff_login(username=user_data.username, password=user_data.password)
+    results=await user_service.staff_login(username=user_data.username, password=user_data.password,
+                                     client_ip=get_remote_address(request))
     return results
 
 
+@router.post("/refresh", response_model=Token)
+def refresh_token(data: RefreshToken, db: Session = Depends(get_db)):
+    return RefreshTokenService().refresh(db, data.refresh_token)
+
+
 @router.patch("/forgot/password", response_model=GenericResponse)
 async def forgot_password(data:PasswordUpdate,email: str = Query(None, min_length=1, max_length=50, description="Enter user email"),db:Session=Depends(get_db)):
     users_service=CoreManagementService(db)
-    results=users_service.update_password(user_id=None,
+    results=await users_service.update_password(user_id=None,
                                           password_update=data,
                                           forgot_password=True,
                                           user_email=email)
@@ -6,13 +6,15 @@ from app.database import get_db
 from app.schemas.book import (
     BookCreate, BookUpdate, BookResponse, BookSearchParams,
     AuthorCreate, AuthorResponse, PublisherCreate, PublisherResponse,
-    CategoryResponse
+    CategoryResponse, AuthorBulkCreate, PublisherBulkCreate, CategoryBulkCreate,
+    BulkUpsertResponse
 )
 from app.schemas.paginated_response import PaginatedResponse
 from app.schemas.user import UserToken
 from app.security.access_level_middleware import require_role
 from app.services.book_service import BookService
 from app.services.book_lisiting_service import BookListingService
+from app.utils.common_utils import model_json_response
 
 from app.utils.constants import ADMIN_ACCESS_LEVEL, LIBRARIAN_ACCESS_LEVEL, USER_ACCESS_LEVEL
 
@@ -31,7 +33,7 @@ async def get_book(
     db: Session = Depends(get_db),
     _:UserToken = Depends(require_role(min_access_level=USER_ACCESS_LEVEL, api_key_required=False))
 ):
-    return BookService().get_book(db, book_id, pick_cache_if_available=True)
+    return BookService().get_book_json(db, book_id)
 
 
 @router.put("/{book_id}",response_model=BookResponse)
@@ -108,6 +110,32 @@ async def create_category(
 
 
 
+@router.post("/authors/bulk",response_model=BulkUpsertResponse)
+async def bulk_create_authors(
+    data: AuthorBulkCreate,
+    db: Session = Depends(get_db),
+    _:UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
+):
+    return BookService().bulk_add_authors(db, data.authors)
+
+
+@router.post("/publishers/bulk",response_model=BulkUpsertResponse)
+async def bulk_create_publishers(
+    data: PublisherBulkCreate,
+    db: Session = Depends(get_db),
+    _:UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
+):
+    return BookService().bulk_add_publishers(db, data.publishers)
+
+
+@router.post("/categories/bulk",response_model=BulkUpsertResponse)
+async def bulk_create_categories(
+    data: CategoryBulkCreate,
+    db: Session = Depends(get_db),
+    _:UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
+):
+    return BookService().bulk_add_categories(db, data.categories)
+
 
 @router.get("/",response_model=PaginatedResponse[BookResponse])
 async def list_books(
@@ -125,7 +153,7 @@ async def list_books(
         db: Session = Depends(get_db),
         _:UserToken = Depends(require_role(min_access_level=USER_ACCESS_LEVEL, api_key_required=False))
 ):
-    return BookListingService().list_books(
+    return model_json_response(BookListingService().list_books(
         db=db,
         title=title,
         author_id=author_id,
@@ -138,7 +166,7 @@ async def list_books(
         sort_order=sort_order,
         page=page,
         items_per_page=items_per_page
-    )
+    ))
 
 
 @router.get("/authors/list",response_model=PaginatedResponse[AuthorResponse])
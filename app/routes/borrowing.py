@@ -1,22 +1,36 @@
-from fastapi import APIRouter, Depends, Query, Path, status, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, Path, status, BackgroundTasks, Response
 from sqlalchemy.orm import Session
+from datetime import datetime
 from typing import List, Optional
 
+from app.config import settings
 from app.database import get_db
 from app.schemas.borrowing import (
-    BorrowingCreate, BorrowingResponse, BorrowingHistory, BorrowingWithBookInfo
+    BorrowingCreate, BorrowingResponse, BorrowingHistory, BorrowingWithBookInfo,
+    BorrowingBulkCreate, BorrowingBulkReturn, BulkBorrowingResponse, borrowing_with_book_info_list
 )
-from app.schemas.generic import GenericResponse
+from app.schemas.book_request import QueuePositionResponse
+from app.schemas.generic import GenericResponse, CacheStatsResponse, PartitionListResponse
 from app.schemas.paginated_response import PaginatedResponse
 from app.schemas.user import UserToken
 from app.security.access_level_middleware import require_role
-from app.services.borrowing_service import BorrowingService
+from app.services.borrowing_partition_service import BorrowingPartitionService
+from app.services.borrowing_service import BorrowingService, CachedJson, user_borrowings_cache_stats
+from app.utils.common_utils import json_response, model_json_response
 
-from app.utils.constants import LIBRARIAN_ACCESS_LEVEL, USER_ACCESS_LEVEL, BorrowingStatus
+from app.utils.constants import ADMIN_ACCESS_LEVEL, LIBRARIAN_ACCESS_LEVEL, USER_ACCESS_LEVEL, BorrowingStatus
 
 router = APIRouter()
 
 
+def _cached_json_response(result: CachedJson) -> Response:
+    response = json_response(result.body)
+    response.headers["X-Cache"] = "HIT" if result.hit else "MISS"
+    if result.hit:
+        response.headers["Server-Timing"] = f"cache;dur={result.elapsed * 1000:.2f}"
+    return response
+
+
 @router.post("/",response_model=BorrowingResponse,status_code=status.HTTP_201_CREATED)
 async def borrow_book(
         borrowing_data: BorrowingCreate,
@@ -26,7 +40,36 @@ async def borrow_book(
     return BorrowingService().borrow_book(
         db=db,
         user_id=current_user.user_id,
-        borrowing_data=borrowing_data
+        borrowing_data=borrowing_data,
+        access_level=current_user.role
+    )
+
+
+@router.post("/bulk",response_model=BulkBorrowingResponse)
+async def bulk_borrow_books(
+        borrowing_data: BorrowingBulkCreate,
+        db: Session = Depends(get_db),
+        current_user: UserToken = Depends(require_role(min_access_level=USER_ACCESS_LEVEL,api_key_required=True))
+):
+    return BorrowingService().bulk_borrow_books(
+        db=db,
+        user_id=current_user.user_id,
+        book_ids=borrowing_data.book_ids,
+        access_level=current_user.role
+    )
+
+
+@router.put("/bulk/return",response_model=BulkBorrowingResponse)
+async def bulk_return_books(
+        return_data: BorrowingBulkReturn,
+        db: Session = Depends(get_db),
+        current_user: UserToken = Depends(require_role(min_access_level=USER_ACCESS_LEVEL,api_key_required=True))
+):
+    return BorrowingService().bulk_return_books(
+        db=db,
+        borrowing_ids=return_data.borrowing_ids,
+        user_id=current_user.user_id,
+        access_level=current_user.role
     )
 
 
@@ -44,6 +87,14 @@ async def return_book(
     )
 
 
+@router.get("/partitions",response_model=PartitionListResponse)
+async def list_borrowing_partitions(
+    db: Session = Depends(get_db),
+    _: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))
+):
+    return PartitionListResponse(partitions=BorrowingPartitionService().list_partitions(db))
+
+
 @router.get("/{borrowing_id}",response_model=BorrowingResponse)
 async def get_borrowing(
         borrowing_id: int = Path(..., ge=1),
@@ -56,25 +107,40 @@ async def get_borrowing(
 
 @router.get("/users/me/borrowings", response_model=BorrowingHistory)
 async def get_my_borrowings(
+        past_limit: Optional[int] = Query(None, ge=1, description="Maximum number of past borrowings to return"),
+        include_archive: bool = Query(False, description="Include archived loans in the history"),
         db: Session = Depends(get_db),
         current_user: UserToken = Depends(require_role(min_access_level=USER_ACCESS_LEVEL ,api_key_required=True))
 ):
-    return BorrowingService().get_user_borrowings(
+    return _cached_json_response(BorrowingService().get_user_borrowings_json(
         db=db,
-        user_id=current_user.user_id
-    )
+        user_id=current_user.user_id,
+        past_limit=past_limit,
+        include_archive=include_archive
+    ))
 
 
 @router.get("/users/{user_id}/borrowings",response_model=BorrowingHistory)
 async def get_user_borrowings(
         user_id: int = Path(..., ge=1),
+        past_limit: Optional[int] = Query(None, ge=1, description="Maximum number of past borrowings to return"),
+        include_archive: bool = Query(False, description="Include archived loans in the history"),
         db: Session = Depends(get_db),
         _:UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
 ):
-    return BorrowingService().get_user_borrowings(
+    return _cached_json_response(BorrowingService().get_user_borrowings_json(
         db=db,
-        user_id=user_id
-    )
+        user_id=user_id,
+        past_limit=past_limit,
+        include_archive=include_archive
+    ))
+
+
+@router.get("/cache/stats",response_model=CacheStatsResponse)
+async def get_borrowing_cache_stats(
+    _: UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
+):
+    return user_borrowings_cache_stats.snapshot()
 
 
 @router.post("/update-overdue",response_model=GenericResponse,status_code=status.HTTP_200_OK)
@@ -85,25 +151,82 @@ async def update_overdue_status(
     count = BorrowingService().update_overdue_status(db)
     return GenericResponse(**{"message": f"Updated {count} borrowings to overdue status"})
 
+@router.post("/holds/expire",response_model=GenericResponse,status_code=status.HTTP_200_OK)
+async def expire_holds(
+    db: Session = Depends(get_db),
+    _: UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
+):
+    count = BorrowingService().expire_holds(db)
+    return GenericResponse(**{"message": f"Expired {count} unclaimed holds"})
+
+@router.post("/queue/reconcile",response_model=GenericResponse,status_code=status.HTTP_200_OK)
+async def reconcile_request_queues(
+    db: Session = Depends(get_db),
+    _: UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
+):
+    count = BorrowingService().reconcile_request_queues(db)
+    return GenericResponse(**{"message": f"Reconciled request queues for {count} books"})
+
+@router.post("/partitions/ensure",response_model=PartitionListResponse,status_code=status.HTTP_200_OK)
+async def ensure_borrowing_partitions(
+    months_ahead: Optional[int] = Query(None, ge=0, le=24, description="Months to create ahead of the current one"),
+    db: Session = Depends(get_db),
+    _: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))
+):
+    return PartitionListResponse(partitions=BorrowingPartitionService().ensure_partitions(db, months_ahead))
+
+@router.post("/partitions/detach",response_model=PartitionListResponse,status_code=status.HTTP_200_OK)
+async def detach_borrowing_partitions(
+    older_than_months: int = Query(..., ge=1, description="Detach monthly partitions that ended this many months ago"),
+    db: Session = Depends(get_db),
+    _: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))
+):
+    return PartitionListResponse(partitions=BorrowingService().detach_borrowing_partitions(db, older_than_months))
+
+@router.post("/archive",response_model=GenericResponse,status_code=status.HTTP_200_OK)
+async def archive_returned_borrowings(
+    older_than_months: int = Query(settings.BORROWINGS_ARCHIVE_AFTER_MONTHS, ge=1,
+                                   description="Archive loans returned more than this many months ago"),
+    db: Session = Depends(get_db),
+    _: UserToken = Depends(require_role(min_access_level=ADMIN_ACCESS_LEVEL))
+):
+    count = BorrowingService().archive_returned_borrowings(db, older_than_months)
+    return GenericResponse(**{"message": f"Archived {count} returned borrowings"})
+
+@router.get("/books/{book_id}/queue/position",response_model=QueuePositionResponse)
+async def get_queue_position(
+        book_id: int = Path(..., ge=1),
+        db: Session = Depends(get_db),
+        current_user: UserToken = Depends(require_role(min_access_level=USER_ACCESS_LEVEL,api_key_required=True))
+):
+    return BorrowingService().get_queue_position(
+        db=db,
+        book_id=book_id,
+        user_id=current_user.user_id
+    )
+
 @router.get("/books/overdue",response_model=List[BorrowingWithBookInfo])
 async def get_overdue_borrowings(
         db: Session = Depends(get_db),
         _: UserToken= Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
 ):
-    print("here")
-    return BorrowingService().get_overdue_borrowings(db)
+    return model_json_response(BorrowingService().get_overdue_borrowings(db), adapter=borrowing_with_book_info_list)
 
 
 @router.get("/books/{book_id}/borrowings",response_model=List[BorrowingWithBookInfo])
 async def get_book_borrowing_history(
         book_id: int = Path(..., ge=1),
+        borrowed_after: Optional[datetime] = Query(None, description="Only borrowings made on or after this date"),
+        include_archive: bool = Query(False, description="Include archived loans"),
         db: Session = Depends(get_db),
         _: UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
 ):
-    return BorrowingService().get_book_borrowing_history(
+    return model_json_response(BorrowingService().get_book_borrowing_history(
         db=db,
-        book_id=book_id
-    )
+        book_id=book_id,
+        borrowed_after=borrowed_after,
+        include_archive=include_archive
+    ), adapter=borrowing_with_book_info_list)
 
 
 @router.get("/",response_model=PaginatedResponse[BorrowingWithBookInfo])
@@ -112,6 +235,7 @@ async def list_borrowings(
         book_id: Optional[int] = Query(None, description="Filter by book ID"),
         status: Optional[BorrowingStatus] = Query(None, description="Filter by return status"),
         overdue_only: bool = Query(False, description="Show only overdue borrowings"),
+        borrowed_after: Optional[datetime] = Query(None, description="Only borrowings made on or after this date"),
         sort_by: str = Query("borrow_date", description="Sort by: borrow_date, due_date, return_date"),
         sort_order: str = Query("desc", description="Sort order: asc or desc"),
         page: int = Query(1, ge=1, description="Page number"),
@@ -119,15 +243,15 @@ async def list_borrowings(
         db: Session = Depends(get_db),
         _:UserToken = Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))
 ):
-    return BorrowingService().list_borrowings(
+    return model_json_response(BorrowingService().list_borrowings(
         db=db,
         user_id=user_id,
         book_id=book_id,
         status=status,
         overdue_only=overdue_only,
+        borrowed_after=borrowed_after,
         sort_by=sort_by,
         sort_order=sort_order,
         page=page,
         items_per_page=items_per_page
-    )
-
+    ))
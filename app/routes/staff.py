@@ -21,7 +21,7 @@ async def update_password(data:UserPasswordUpdate,db:Session=Depends(get_db),
                           current_user:UserToken =Depends(require_role(min_access_level=LIBRARIAN_ACCESS_LEVEL))):
     users_service = CoreManagementService(db)
     print(current_user)
-    results = users_service.update_password(user_id=current_user.user_id,
+    results = await users_service.update_password(user_id=current_user.user_id,
                                             password_update=data,
                                             forgot_password=False,
                                             user_email=None)
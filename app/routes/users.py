@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, Request
+from slowapi.util import get_remote_address
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -17,19 +18,20 @@ router = APIRouter()
 @router.post("/register", response_model=UserResponse)
 async def register_user(user_data:UserCreate, db: Session = Depends(get_db)):
     user_service = UserService(db)
-    results=user_service.create_candidate_user(user_create=user_data)
+    results=await user_service.create_candidate_user(user_create=user_data)
     return results
 
 @router.post("/reset-key/{username}", response_model=KeyResponse)
-async def reset_key(username:str, db:Session=Depends(get_db)):
+def reset_key(username:str, db:Session=Depends(get_db)):
     user_service =UserService(db)
     results=user_service.reset_api_key(username)
     return {'api_key':results}
 
 @router.post("/login", response_model=Token)
-async def login_user(login_creds:LoginCredentials, api_key: str = Header(..., alias=API_KEY_HEADER), db:Session=Depends(get_db)):
+async def login_user(request: Request, login_creds:LoginCredentials, api_key: str = Header(..., alias=API_KEY_HEADER), db:Session=Depends(get_db)):
     users_service=UserService(db)
-    results=users_service.user_login(api_key=api_key, username=login_creds.username, password=login_creds.password)
+    results=await users_service.user_login(api_key=api_key, username=login_creds.username, password=login_creds.password,
+                                     client_ip=get_remote_address(request))
     return results
 
 @router.get("/", response_model=UserToken)
@@ -39,7 +41,7 @@ async def get_user_details(db: Session = Depends(get_db),
     return current_user
 
 @router.patch("/", response_model=UserInDB)
-async def update_user_details(data:UserUpdate,db:Session=Depends(get_db),api_key: str = Header(..., alias=API_KEY_HEADER),
+def update_user_details(data:UserUpdate,db:Session=Depends(get_db),api_key: str = Header(..., alias=API_KEY_HEADER),
                               current_user =  Depends(require_role(min_access_level=USER_ACCESS_LEVEL, api_key_required=True))):
     users_service=UserService(db=db)
     results=users_service.update(user_id=current_user.user_id, user_update=data)
@@ -49,5 +51,5 @@ async def update_user_details(data:UserUpdate,db:Session=Depends(get_db),api_key
 async def update_password(data:UserPasswordUpdate,db:Session=Depends(get_db),api_key: str = Header(..., alias=API_KEY_HEADER),
                           current_user =  Depends(require_role(min_access_level=USER_ACCESS_LEVEL, api_key_required=True))):
     users_service=UserService(db)
-    results=users_service.update_user_password(user_id=current_user.user_id,api_key=api_key, update_password=data)
+    results=await users_service.update_user_password(user_id=current_user.user_id,api_key=api_key, update_password=data)
     return results
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.security.jwt_keys import jwt_key_ring
+
+well_known_router = APIRouter()
+
+
+@well_known_router.get("/.well-known/jwks.json", tags=["authentication"])
+async def get_jwks():
+    return jwt_key_ring.jwks()
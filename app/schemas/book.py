@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 from fastapi import HTTPException
 
+from app.schemas.category import CategoryCreate
+
 
 class AuthorBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -50,6 +52,30 @@ class BookAuthorResponse(BookAuthorBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AuthorBulkCreate(BaseModel):
+    authors: List[AuthorCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class PublisherBulkCreate(BaseModel):
+    publishers: List[PublisherCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class CategoryBulkCreate(BaseModel):
+    categories: List[CategoryCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUpsertItem(BaseModel):
+    id: int
+    name: str
+    created: bool
+
+
+class BulkUpsertResponse(BaseModel):
+    items: List[BulkUpsertItem]
+    created: int
+    existing: int
+
+
 class CategoryResponse(BaseModel):
     category_id: int
     name: str
@@ -122,6 +148,7 @@ class BookUpdate(BaseModel):
 class BookInDB(BookBase):
     book_id: int
     available_copies: int
+    total_loans: int = 0
     added_date: datetime
     category: Optional[CategoryResponse] = None
     publisher: Optional[PublisherResponse] = None
@@ -20,4 +20,11 @@ class BookRequestResponse(BaseModel):
 
 
 class BookRequestUpdate(BaseModel):
-    status: Optional[str] = None
\ No newline at end of file
+    status: Optional[str] = None
+
+
+class QueuePositionResponse(BaseModel):
+    book_id: int
+    position: int
+    queue_length: int
+    estimated_wait_days: int
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 
@@ -16,6 +16,14 @@ class BorrowingCreate(BaseModel):
     book_id: int
 
 
+class BorrowingBulkCreate(BaseModel):
+    book_ids: List[int] = Field(..., min_length=1, max_length=50)
+
+
+class BorrowingBulkReturn(BaseModel):
+    borrowing_ids: List[int] = Field(..., min_length=1, max_length=50)
+
+
 class BorrowingUpdate(BaseModel):
     status: Optional[BorrowingStatus] = None
     due_date: Optional[datetime] = None
@@ -45,6 +53,10 @@ class BorrowingWithBookInfo(BorrowingInDB):
     model_config = ConfigDict(from_attributes=True)
 
 
+# validates a whole result set in one call instead of one model construction per row
+borrowing_with_book_info_list = TypeAdapter(List[BorrowingWithBookInfo])
+
+
 class BorrowingResponse(BorrowingInDB):
     book: Optional[BookResponse] = None
 
@@ -54,3 +66,17 @@ class BorrowingResponse(BorrowingInDB):
 class BorrowingHistory(BaseModel):
     current_borrowings: List[BorrowingWithBookInfo]
     past_borrowings: List[BorrowingWithBookInfo]
+
+
+class BulkBorrowingItemResult(BaseModel):
+    book_id: Optional[int] = None
+    borrowing_id: Optional[int] = None
+    success: bool
+    detail: Optional[str] = None
+    borrowing: Optional[BorrowingInDB] = None
+
+
+class BulkBorrowingResponse(BaseModel):
+    results: List[BulkBorrowingItemResult]
+    succeeded: int
+    failed: int
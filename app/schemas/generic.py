@@ -1,5 +1,29 @@
+from typing import List
 from pydantic import BaseModel
 
 
 class GenericResponse(BaseModel):
-    message:str
\ No newline at end of file
+    message:str
+
+class CacheStatsResponse(BaseModel):
+    name: str
+    hits: int
+    misses: int
+    hit_ratio: float
+    avg_hit_latency_ms: float
+
+
+class PartitionListResponse(BaseModel):
+    partitions: List[str]
+
+
+class HashingStatsResponse(BaseModel):
+    max_workers: int
+    max_queue: int
+    submitted: int
+    completed: int
+    rejected: int
+    queued: int
+    running: int
+    avg_wait_ms: float
+    avg_run_ms: float
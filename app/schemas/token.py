@@ -5,6 +5,7 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     expires_in: str
+    refresh_token: Optional[str] = None
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
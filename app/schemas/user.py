@@ -67,6 +67,7 @@ class UserInDB(UserBase):
     user_id: int
     date_joined: datetime
     is_active: bool
+    active_loans: int = 0
 
     class Config:
         from_attributes = True
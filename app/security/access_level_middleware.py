@@ -13,12 +13,9 @@ class RoleBasedAccessMiddleware:
                             api_key: str|None,min_access_level: int = 3,
                             verify_api_key: bool = True
                             ) -> UserToken:
-        payload = self.__helper.validate_jwt(token)
-
-        user_role = payload.get("role")
-        if user_role is None:
-            raise HTTPException(status_code=401, detail="Invalid user role")
+        validated = self.__helper.validate_token(token)
 
+        user_role = validated.user.role
         if user_role < min_access_level:
             raise HTTPException(
                 status_code=403,
@@ -28,10 +25,9 @@ class RoleBasedAccessMiddleware:
         if verify_api_key:
             if not api_key:
                 raise HTTPException(status_code=401, detail="Invalid Api Key")
-            self.__helper.candidate_key_validation(api_key=api_key, payload=payload)
+            await self.__helper.candidate_key_validation(api_key=api_key, token=validated)
 
-        user = self.__helper.return_user_model(payload=payload)
-        return user
+        return validated.user
 
 
 role_middleware = RoleBasedAccessMiddleware()
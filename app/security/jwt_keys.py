@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from secrets import token_hex
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+from app.config import settings
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+except ImportError:
+    serialization = None
+
+logger = logging.getLogger(__name__)
+
+EDDSA = "EdDSA"
+ES256 = "ES256"
+ASYMMETRIC_ALGORITHMS = (EDDSA, ES256)
+SECRET_KEY_ALGORITHM = "HS256"
+
+JWKS_FILE = "jwks.json"
+KID_TIME_FORMAT = "%Y%m%d%H%M%S%f"
+UNKNOWN_KID_RELOAD_SECONDS = 5
+RETIRE_LEEWAY = timedelta(minutes=5)
+
+
+class SigningKey(NamedTuple):
+    kid: str
+    algorithm: str
+    created_at: Optional[datetime]
+    public_key: Any
+    private_key: Optional[Any]
+
+
+class JwtKeyRing:
+    """
+        Signs and verifies access tokens.
+
+        With an EdDSA or ES256 algorithm, tokens are signed with the newest private key in
+        keys_dir (<kid>.pem) and carry its kid header. Older keys keep verifying until every token
+        they signed has expired, then rotate() retires them. The public keys are written to
+        keys_dir/jwks.json and served at /.well-known/jwks.json, so websocket and edge nodes can
+        verify tokens from the JWKS document alone, without the private keys or SECRET_KEY.
+
+        Every instance has to sign with the same keys, so keys_dir is shared storage (a volume or
+        secret mounted on all of them) provisioned before start; only with generate_signing_key,
+        meant for a single instance, is a missing first key created at startup.
+
+        With any other algorithm tokens are signed with SECRET_KEY as before. Tokens without a
+        kid are verified with SECRET_KEY while accept_secret_key_tokens is on, and only until a
+        token lifetime after the oldest key was created: sessions issued before the switch stay
+        valid until they expire, but SECRET_KEY cannot mint accepted tokens after that.
+    """
+
+    def __init__(self, algorithm: str, keys_dir: str, secret_key: str, token_lifetime: timedelta,
+                 accept_secret_key_tokens: bool = True, generate_signing_key: bool = False,
+                 reload_seconds: int = 60):
+        self.algorithm = algorithm
+        self.asymmetric = algorithm in ASYMMETRIC_ALGORITHMS
+        if self.asymmetric and serialization is None:
+            raise RuntimeError(f"{algorithm} tokens need the cryptography package")
+
+        self.keys_dir = Path(keys_dir)
+        self.secret_key = secret_key
+        self.secret_key_algorithm = SECRET_KEY_ALGORITHM if self.asymmetric else algorithm
+        self.token_lifetime = token_lifetime
+        self.accept_secret_key_tokens = accept_secret_key_tokens or not self.asymmetric
+        self.generate_signing_key = generate_signing_key
+        self.reload_seconds = reload_seconds
+        self.__algorithms = get_default_algorithms()
+        self.__lock = threading.Lock()
+        self.__keys: Dict[str, SigningKey] = {}
+        self.__active: Optional[SigningKey] = None
+        self.__loaded_at = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "JwtKeyRing":
+        return cls(
+            algorithm=settings.ALGORITHM,
+            keys_dir=settings.JWT_KEYS_DIR,
+            secret_key=settings.SECRET_KEY,
+            token_lifetime=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            accept_secret_key_tokens=settings.JWT_ACCEPT_SECRET_KEY_TOKENS,
+            generate_signing_key=settings.JWT_GENERATE_SIGNING_KEY,
+            reload_seconds=settings.JWT_KEYS_RELOAD_SECONDS,
+        )
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        if not self.asymmetric:
+            return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+        if time.monotonic() - self.__loaded_at > self.reload_seconds:
+            self.reload()
+        key = self.__active
+        if key is None:
+            raise RuntimeError(f"No JWT signing key in {self.keys_dir}")
+        return jwt.encode(claims, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verified claims of token; raises jwt.PyJWTError when it is not valid."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if not self._accepts_secret_key_tokens():
+                raise jwt.InvalidTokenError("Token has no key id")
+            return jwt.decode(token, self.secret_key, algorithms=[self.secret_key_algorithm])
+
+        key = self.__keys.get(kid)
+        if key is None and time.monotonic() - self.__loaded_at > UNKNOWN_KID_RELOAD_SECONDS:
+            # a key rotated in by another worker since the last load
+            self.reload()
+            key = self.__keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    def _accepts_secret_key_tokens(self) -> bool:
+        if not self.asymmetric:
+            return True
+        if not self.accept_secret_key_tokens:
+            return False
+        if not self.__loaded_at:
+            self.reload()
+        # no token signed with SECRET_KEY before the switch outlives the first key by more than a lifetime
+        first_created_at = min((key.created_at for key in self.__keys.values() if key.created_at), default=None)
+        return first_created_at is not None and datetime.utcnow() < first_created_at + self.token_lifetime
+
+    def reload(self) -> None:
+        # nodes holding private keys own the ring; verify-only nodes just read the JWKS document
+        keys = {key.kid: key for key in self._read_private_keys() or self._read_jwks()}
+        signing = sorted((key for key in keys.values() if key.private_key is not None), key=lambda key: key.kid)
+
+        with self.__lock:
+            self.__keys = keys
+            self.__active = signing[-1] if signing else None
+            self.__loaded_at = time.monotonic()
+
+    def ensure_signing_key(self) -> None:
+        """
+            Checks keys_dir holds a signing key for the algorithm at startup; a no-op for SECRET_KEY
+            signing. The key is only created here when generate_signing_key is set, since a key
+            made per host would leave each replica signing tokens the others cannot verify.
+        """
+        if not self.asymmetric:
+            return
+        self.reload()
+        if self.__active is None or self.__active.algorithm != self.algorithm:
+            if not self.generate_signing_key:
+                raise RuntimeError(
+                    f"No {self.algorithm} signing key in {self.keys_dir}. Provision one into this directory on "
+                    f"storage shared by every instance (python -m app.security.jwt_keys), or set "
+                    f"JWT_GENERATE_SIGNING_KEY=true on a single instance"
+                )
+            self.rotate()
+        else:
+            self._write_jwks()
+
+    def rotate(self) -> str:
+        """Adds a new signing key, retires keys no live token can use, and rewrites the JWKS document."""
+        if not self.asymmetric:
+            raise RuntimeError(f"{self.algorithm} tokens are signed with SECRET_KEY; there are no keys to rotate")
+
+        kid = self._generate_key()
+        self.reload()
+        for retired in self._retired_keys():
+            (self.keys_dir / f"{retired.kid}.pem").unlink(missing_ok=True)
+            logger.info(f"Retired JWT signing key {retired.kid}")
+        self.reload()
+        self._write_jwks()
+        return kid
+
+    def jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        keys = []
+        for key in sorted(self.__keys.values(), key=lambda key: key.kid):
+            jwk = json.loads(self.__algorithms[key.algorithm].to_jwk(key.public_key))
+            jwk.update(kid=key.kid, alg=key.algorithm, use="sig")
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def _generate_key(self) -> str:
+        if self.algorithm == EDDSA:
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = ec.generate_private_key(ec.SECP256R1())
+        pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                        serialization.NoEncryption())
+
+        kid = f"{datetime.utcnow().strftime(KID_TIME_FORMAT)}-{token_hex(4)}"
+        self.keys_dir.mkdir(parents=True, exist_ok=True)
+        descriptor = os.open(self.keys_dir / f"{kid}.pem", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, "wb") as key_file:
+            key_file.write(pem)
+        logger.info(f"Created JWT signing key {kid} ({self.algorithm})")
+        return kid
+
+    def _retired_keys(self) -> List[SigningKey]:
+        """Keys whose successor is older than the token lifetime, so nothing valid is signed with them."""
+        now = datetime.utcnow()
+        keys = sorted(self.__keys.values(), key=lambda key: key.kid)
+        return [
+            key for key, successor in zip(keys, keys[1:])
+            if key.private_key is not None and successor.created_at is not None
+            and successor.created_at + self.token_lifetime + RETIRE_LEEWAY < now
+        ]
+
+    def _read_private_keys(self) -> List[SigningKey]:
+        if serialization is None:
+            return []
+        keys = []
+        for path in sorted(self.keys_dir.glob("*.pem")):
+            try:
+                private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load JWT signing key {path.name}: {str(e)}")
+                continue
+
+            if isinstance(private_key, ed25519.Ed25519PrivateKey):
+                algorithm = EDDSA
+            elif isinstance(private_key, ec.EllipticCurvePrivateKey) and isinstance(private_key.curve, ec.SECP256R1):
+                algorithm = ES256
+            else:
+                logger.error(f"Unsupported JWT signing key type in {path.name}")
+                continue
+            keys.append(SigningKey(path.stem, algorithm, self._created_at(path.stem),
+                                   private_key.public_key(), private_key))
+        return keys
+
+    def _read_jwks(self) -> List[SigningKey]:
+        path = self.keys_dir / JWKS_FILE
+        if not path.exists():
+            return []
+        try:
+            jwk_set = jwt.PyJWKSet.from_json(path.read_text())
+        except (OSError, jwt.PyJWTError) as e:
+            logger.error(f"Could not load {path}: {str(e)}")
+            return []
+        return [
+            SigningKey(jwk.key_id, jwk.algorithm_name, self._created_at(jwk.key_id), jwk.key, None)
+            for jwk in jwk_set.keys if jwk.key_id and jwk.algorithm_name in ASYMMETRIC_ALGORITHMS
+        ]
+
+    def _write_jwks(self) -> None:
+        path = self.keys_dir / JWKS_FILE
+        staging = path.with_suffix(f".{token_hex(4)}.tmp")
+        staging.write_text(json.dumps(self.jwks(), indent=2))
+        os.replace(staging, path)
+
+    @staticmethod
+    def _created_at(kid: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(kid.split("-", 1)[0], KID_TIME_FORMAT)
+        except ValueError:
+            return None
+
+
+jwt_key_ring = JwtKeyRing.from_settings()
+
+
+if __name__ == "__main__":
+    # provisions a new signing key into JWT_KEYS_DIR before the instances sharing it are started
+    print(f"Signing key {jwt_key_ring.rotate()} is now active")
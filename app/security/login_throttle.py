@@ -0,0 +1,109 @@
+import logging
+import math
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.core.redis_cache_service import RedisCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class LoginThrottle:
+    """
+        Failed-login tracking per username and per client IP, checked before any password
+        or API key hashing runs.
+
+        Each failure bumps login_failures:{scope}:{id}, a counter that lives for
+        LOGIN_FAILURE_WINDOW_SECONDS after the last failure. Past the free attempts, a
+        login_block:{scope}:{id} key is set for an exponentially growing delay. At the lockout
+        threshold it is set for LOGIN_LOCKOUT_SECONDS instead. While a block key exists, login
+        attempts get a 429 with Retry-After and cost a single Redis round trip.
+
+        A successful login clears the username's counter but not the IP's, so one valid account
+        does not launder a credential-stuffing run from the same address. If Redis is down the
+        throttle fails open and logins behave as before.
+    """
+
+    FAILURES_PREFIX = "login_failures:"
+    BLOCK_PREFIX = "login_block:"
+
+    def __init__(self):
+        self.redis_client = RedisCacheService().redis_client
+
+    @staticmethod
+    def _scopes(username: str, client_ip: Optional[str]) -> List[Tuple[str, int, int]]:
+        """(key suffix, free attempts, lockout attempts) for every tracked scope of an attempt."""
+        scopes = [(f"user:{username.lower()[:255]}", settings.LOGIN_FREE_ATTEMPTS, settings.LOGIN_LOCKOUT_ATTEMPTS)]
+        if client_ip:
+            scopes.append((f"ip:{client_ip}", settings.LOGIN_IP_FREE_ATTEMPTS, settings.LOGIN_IP_LOCKOUT_ATTEMPTS))
+        return scopes
+
+    @staticmethod
+    def backoff_seconds(failures: int, free_attempts: int, lockout_attempts: int) -> int:
+        if failures >= lockout_attempts:
+            return settings.LOGIN_LOCKOUT_SECONDS
+        if failures <= free_attempts:
+            return 0
+        delay = settings.LOGIN_BACKOFF_BASE_SECONDS * 2 ** (failures - free_attempts - 1)
+        return min(delay, settings.LOGIN_BACKOFF_MAX_SECONDS)
+
+    def check(self, username: str, client_ip: Optional[str]) -> None:
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for suffix, _, _ in self._scopes(username, client_ip):
+                pipeline.pttl(self.BLOCK_PREFIX + suffix)
+            remaining_ms = max(pipeline.execute())
+        except Exception as e:
+            logger.error(f"Login throttle check error: {str(e)}")
+            return
+
+        if remaining_ms > 0:
+            retry_after = math.ceil(remaining_ms / 1000)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many failed login attempts, please retry in {retry_after} seconds",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+    def record_failure(self, username: str, client_ip: Optional[str]) -> None:
+        scopes = self._scopes(username, client_ip)
+        try:
+            pipeline = self.redis_client.pipeline()
+            for suffix, _, _ in scopes:
+                pipeline.incr(self.FAILURES_PREFIX + suffix)
+                pipeline.expire(self.FAILURES_PREFIX + suffix, settings.LOGIN_FAILURE_WINDOW_SECONDS)
+            failures = pipeline.execute()[::2]
+
+            pipeline = self.redis_client.pipeline()
+            for (suffix, free_attempts, lockout_attempts), count in zip(scopes, failures):
+                delay = self.backoff_seconds(count, free_attempts, lockout_attempts)
+                if delay:
+                    pipeline.set(self.BLOCK_PREFIX + suffix, count, ex=delay)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"Login throttle update error: {str(e)}")
+
+    def record_success(self, username: str) -> None:
+        suffix = self._scopes(username, None)[0][0]
+        try:
+            self.redis_client.delete(self.FAILURES_PREFIX + suffix, self.BLOCK_PREFIX + suffix)
+        except Exception as e:
+            logger.error(f"Login throttle reset error: {str(e)}")
+
+    @contextmanager
+    def attempt(self, username: str, client_ip: Optional[str]) -> Iterator[None]:
+        """Wraps a login: rejects throttled attempts up front and counts the 401s it raises."""
+        self.check(username, client_ip)
+        try:
+            yield
+        except HTTPException as e:
+            if e.status_code == status.HTTP_401_UNAUTHORIZED:
+                self.record_failure(username, client_ip)
+            raise
+        self.record_success(username)
+
+
+login_throttle = LoginThrottle()
@@ -2,41 +2,64 @@ from datetime import datetime
 
 import jwt
 from fastapi import HTTPException
-from jose import jwt, JWTError
-from app.config import settings
 from dateutil import parser as parser
 
 from app.models import UserApiKey
 from app.schemas.user import UserToken
+from app.security.jwt_keys import jwt_key_ring
+from app.security.token_cache import ValidatedToken, token_cache
+from app.security.token_revocation import token_revocations
 
 class MiddlewareHelper:
 
 
     def validate_jwt(self,token):
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            payload = jwt_key_ring.decode(token)
             return payload
-        except JWTError:
+        except jwt.PyJWTError:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
 
-    def candidate_key_validation(self,api_key, payload)->bool:
+    def validate_token(self, token) -> ValidatedToken:
+        """Decoded and validated token, from the per-worker token cache when possible."""
+        validated = token_cache.get(token)
+        if validated is None:
+            payload = self.validate_jwt(token)
+            if payload.get("role") is None:
+                raise HTTPException(status_code=401, detail="Invalid user role")
+
+            key_expires_at = payload.get("key_expires_at", None)
+            validated = ValidatedToken(
+                payload=payload,
+                user=self.return_user_model(payload),
+                expires_at=float(payload.get("exp") or 0),
+                key_expires_at=parser.parse(str(key_expires_at)) if key_expires_at is not None else None
+            )
+            token_cache.put(token, validated)
+
+        if token_revocations.is_revoked(validated.user.user_id, validated.payload.get("iat")):
+            raise HTTPException(status_code=401, detail="Token has been revoked, Please login again")
+        return validated
+
+
+    async def candidate_key_validation(self,api_key, token: ValidatedToken)->bool:
         if not api_key:
             raise HTTPException(status_code=401, detail="Invalid Api Key")
 
+        payload = token.payload
         if payload.get("role") != 1:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
 
         key_hash = payload.get("key_hash", None)
-        key_expires_at = payload.get("key_expires_at", None)
+        key_expires_at = token.key_expires_at
         if key_hash is None or key_expires_at is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        key_expires_at = parser.parse(str(key_expires_at))
         now = datetime.utcnow()
         if key_expires_at < now:
             raise HTTPException(status_code=401, detail="Api Key has expired, Please generate a new one")
 
-        verify_key = UserApiKey.verify_key(api_key, key_hash)
+        verify_key = await UserApiKey.verify_key_async(api_key, key_hash)
 
         if not verify_key:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
@@ -49,5 +72,4 @@ class MiddlewareHelper:
 
 
     def current_user(self,token):
-        payload=self.validate_jwt(token)
-        return self.return_user_model(payload)
+        return self.validate_token(token).user
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.config import settings
+from app.core.cache_stats import CacheStats
+from app.schemas.user import UserToken
+
+
+class ValidatedToken(NamedTuple):
+    payload: Dict[str, Any]
+    user: UserToken
+    expires_at: float
+    key_expires_at: Optional[datetime]
+
+
+class TokenCache:
+    """
+        Per-worker LRU of tokens that already passed signature and claim validation, keyed
+        by the token's signature segment. A hit skips jwt.decode, date parsing and building
+        UserToken. Entries are dropped once their exp has passed, and the least recently
+        used entry is evicted when max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = CacheStats("jwt_tokens")
+        self.__entries: "OrderedDict[str, ValidatedToken]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return token.rpartition(".")[2]
+
+    def get(self, token: str) -> Optional[ValidatedToken]:
+        started_at = time.perf_counter()
+        key = self._key(token)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry.expires_at <= time.time():
+                    del self.__entries[key]
+                    entry = None
+                else:
+                    self.__entries.move_to_end(key)
+
+        if entry is None:
+            self.stats.record_miss()
+        else:
+            self.stats.record_hit(time.perf_counter() - started_at)
+        return entry
+
+    def put(self, token: str, entry: ValidatedToken) -> None:
+        if self.max_entries <= 0 or entry.expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self.__lock:
+            self.__entries[key] = entry
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
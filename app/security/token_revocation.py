@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+from app.core.redis_cache_service import RedisCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationService:
+    """
+        Per-user "tokens issued before" cut-offs. A token whose iat is older than its user's
+        cut-off is rejected.
+
+        The cut-offs live in the token_revocations Redis hash and every worker keeps a copy in
+        memory, so checking a token is a dict lookup with no Redis round trip. A background
+        thread applies changes published on the token_revocations channel and reloads the
+        whole hash every reload_seconds, which also covers messages missed while disconnected.
+        Cut-offs older than the token lifetime can no longer match a live token and are pruned.
+        Refresh tokens are checked against them too, so that lifetime is the longest of the
+        access and refresh token lifetimes.
+    """
+
+    REVOCATIONS_KEY = "token_revocations"
+    CHANNEL = "token_revocations"
+
+    def __init__(self, token_lifetime_seconds: int, reload_seconds: int = 300):
+        self.redis_client = RedisCacheService().redis_client
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self.reload_seconds = reload_seconds
+        self.__revoked_before: Dict[int, float] = {}
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def is_revoked(self, user_id: int, issued_at: Optional[float]) -> bool:
+        revoked_before = self.__revoked_before.get(user_id)
+        if revoked_before is None:
+            return False
+        # tokens issued before iat was added are treated as issued at the epoch
+        return (issued_at or 0) < revoked_before
+
+    def revoke_user(self, user_id: int) -> None:
+        """Invalidates every token issued to user_id until now, on all workers."""
+        revoked_before = time.time()
+        self.__revoked_before[user_id] = revoked_before
+        try:
+            pipeline = self.redis_client.pipeline()
+            pipeline.hset(self.REVOCATIONS_KEY, str(user_id), repr(revoked_before))
+            pipeline.publish(self.CHANNEL, f"{user_id}:{revoked_before!r}")
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"Token revocation error for user {user_id}: {str(e)}")
+
+    def reload(self) -> None:
+        oldest_live = time.time() - self.token_lifetime_seconds
+        revoked_before: Dict[int, float] = {}
+        stale = []
+        for user_id, value in self.redis_client.hgetall(self.REVOCATIONS_KEY).items():
+            if float(value) < oldest_live:
+                stale.append(user_id)
+            else:
+                revoked_before[int(user_id)] = float(value)
+        if stale:
+            self.redis_client.hdel(self.REVOCATIONS_KEY, *stale)
+        self.__revoked_before = revoked_before
+
+    def start(self) -> None:
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self._run, name="token-revocations", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        if self.__thread and self.__thread.is_alive():
+            self.__thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self.__stop_event.is_set():
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                # subscribe before loading so nothing published in between is lost
+                pubsub.subscribe(self.CHANNEL)
+                self.reload()
+                loaded_at = time.monotonic()
+                while not self.__stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._apply(message["data"])
+                    if time.monotonic() - loaded_at > self.reload_seconds:
+                        self.reload()
+                        loaded_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Token revocation listener error: {str(e)}")
+                self.__stop_event.wait(1.0)
+            finally:
+                pubsub.close()
+
+    def _apply(self, data: str) -> None:
+        user_id, _, revoked_before = data.partition(":")
+        user_id, revoked_before = int(user_id), float(revoked_before)
+        if revoked_before > self.__revoked_before.get(user_id, 0.0):
+            self.__revoked_before[user_id] = revoked_before
+
+
+token_revocations = TokenRevocationService(
+    max(settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60, settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+)
@@ -8,6 +8,7 @@ from app.schemas.librarian import LibrarianCreate
 from app.schemas.paginated_response import PaginatedResponse
 from app.schemas.user import UserCreate, UserInDB
 from app.core.core_management_service import CoreManagementService
+from app.core.role_registry import role_registry
 from app.utils.constants import LIBRARIAN_ACCESS_LEVEL, ADMIN_ACCESS_LEVEL, USER_ACCESS_LEVEL
 
 
@@ -16,8 +17,8 @@ class AdminServices(CoreManagementService):
     def __init__(self, db:Session):
         super().__init__(db)
 
-    def add_staff(self, user_data:UserCreate)->LibrarianCreate:
-        db_user=self.create_user(user_create=user_data,  access_level=LIBRARIAN_ACCESS_LEVEL)
+    async def add_staff(self, user_data:UserCreate)->LibrarianCreate:
+        db_user=await self.create_user(user_create=user_data,  access_level=LIBRARIAN_ACCESS_LEVEL)
         return db_user
 
     def deactivate_staff(self, user_id)->GenericResponse:
@@ -49,12 +50,14 @@ class AdminServices(CoreManagementService):
             query = query.filter(User.is_active == is_active)
 
         if role_type:
-            if role_type.lower() == 'staff':
-                query = query.filter(User.role_id == LIBRARIAN_ACCESS_LEVEL)
-            elif role_type.lower() == 'admin':
-                query = query.filter(User.role_id == ADMIN_ACCESS_LEVEL)
-            elif role_type.lower() == 'candidate':
-                query = query.filter(User.role_id == USER_ACCESS_LEVEL)
+            access_level = {
+                'staff': LIBRARIAN_ACCESS_LEVEL,
+                'admin': ADMIN_ACCESS_LEVEL,
+                'candidate': USER_ACCESS_LEVEL,
+            }.get(role_type.lower())
+            role = role_registry.by_access_level(access_level) if access_level else None
+            if role:
+                query = query.filter(User.role_id == role.role_id)
 
 
         total_count = query.count()
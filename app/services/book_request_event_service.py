@@ -0,0 +1,151 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from secrets import token_hex
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import joinedload
+
+from app.core.redis_cache_service import RedisCacheService
+from app.database import SessionLocal
+from app.models.book import Book, BookAuthor
+from app.models.books_queue import BookRequestQueue
+from app.services.request_queue_mirror_service import RequestQueueMirrorService
+from app.utils.constants import RequestStatus
+
+logger = logging.getLogger(__name__)
+
+# extends the consumer lease if this worker holds it, takes it if nobody does
+_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+class BookRequestEventService:
+    """
+        Queue enrollment only pushes a small event onto a Redis list; a background worker
+        pops it, loads the book metadata once and writes the book_request:{id} hash and the
+        queue mirror entry, keeping both off the borrow request path.
+
+        Every uvicorn worker starts the thread, but only the holder of the consumer lease reads
+        the list, so events are handled by one process at a time. Events are moved to a
+        processing list with BLMOVE and removed from it only after they are handled; a new
+        lease holder first replays whatever a dead consumer left there. Handling is idempotent,
+        so a replayed event is harmless.
+    """
+
+    EVENTS_KEY = "book_request_events"
+    PROCESSING_KEY = "book_request_events:processing"
+    CONSUMER_KEY = "book_request_events:consumer"
+    LEASE_MS = 10000
+
+    def __init__(self):
+        self.redis_client = RedisCacheService().redis_client
+        self.__queue_mirror = RequestQueueMirrorService()
+        self.__lease = self.redis_client.register_script(_LEASE_SCRIPT)
+        self.__consumer_id = token_hex(8)
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def publish(self, book_id: int, user_id: int, request_date: datetime, request_id: int) -> None:
+        self.redis_client.lpush(self.EVENTS_KEY, json.dumps({
+            "request_id": request_id,
+            "book_id": book_id,
+            "user_id": user_id,
+            "request_date": request_date.isoformat(),
+        }))
+
+    def start(self) -> None:
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self._run, name="book-request-events", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        if self.__thread and self.__thread.is_alive():
+            self.__thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        replay = True
+        while not self.__stop_event.is_set():
+            try:
+                if not self.__lease(keys=[self.CONSUMER_KEY], args=[self.__consumer_id, self.LEASE_MS]):
+                    replay = True
+                    self.__stop_event.wait(1.0)
+                    continue
+
+                if replay:
+                    for item in self.redis_client.lrange(self.PROCESSING_KEY, 0, -1)[::-1]:
+                        self._process(item)
+                    replay = False
+
+                item = self.redis_client.blmove(self.EVENTS_KEY, self.PROCESSING_KEY, 1, "RIGHT", "LEFT")
+                if item is not None:
+                    self._process(item)
+            except Exception as e:
+                logger.error(f"Book request event error: {str(e)}")
+                replay = True
+                self.__stop_event.wait(1.0)
+
+    def _process(self, item: str) -> None:
+        """Handles one event and acknowledges it; a failed event stays in the processing list."""
+        try:
+            event = json.loads(item)
+        except ValueError:
+            logger.error(f"Dropping malformed book request event: {item}")
+        else:
+            self._handle(event)
+        self.redis_client.lrem(self.PROCESSING_KEY, 1, item)
+
+    def _handle(self, event: Dict[str, Any]) -> None:
+        book_id = event["book_id"]
+        db = SessionLocal()
+        try:
+            book = db.query(Book).options(
+                joinedload(Book.category),
+                joinedload(Book.publisher),
+                joinedload(Book.authors).joinedload(BookAuthor.author)
+            ).filter(Book.book_id == book_id).first()
+            if book is None or not self._is_pending(db, event):
+                return
+
+            book_data = {
+                "title": book.title,
+                "isbn": book.isbn,
+                "book_id": str(book.book_id),
+                "authors": ",".join([author.author.name for author in book.authors]) if book.authors else "",
+                "publisher": book.publisher.name if book.publisher else "",
+                "category": book.category.name if book.category else "",
+                "total_copies": str(book.total_copies)
+            }
+            self.redis_client.hset(f"book_request:{book_id}", mapping=book_data)
+            self.__queue_mirror.add(book_id, event["user_id"], datetime.fromisoformat(event["request_date"]))
+
+            # an allocation that committed between the check and the ZADD ran its remove() too
+            # early; checking again after the write takes the entry back out in that case
+            if not self._is_pending(db, event):
+                self.__queue_mirror.remove([(book_id, event["user_id"])])
+        finally:
+            db.close()
+
+    @staticmethod
+    def _is_pending(db, event: Dict[str, Any]) -> bool:
+        query = db.query(BookRequestQueue.request_id).filter(
+            BookRequestQueue.status == RequestStatus.PENDING.value
+        )
+        if "request_id" in event:
+            query = query.filter(BookRequestQueue.request_id == event["request_id"])
+        else:
+            query = query.filter(BookRequestQueue.book_id == event["book_id"],
+                                 BookRequestQueue.user_id == event["user_id"])
+        return query.first() is not None
+
+
+book_request_events = BookRequestEventService()
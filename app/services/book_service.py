@@ -1,14 +1,19 @@
-from fastapi import HTTPException, status
-from sqlalchemy import case, text
+from fastapi import HTTPException, status, Response
+from sqlalchemy import case, insert, select, text
 from sqlalchemy.orm import Session, joinedload
-from typing import Optional
+from typing import Optional, List
 from sqlalchemy.sql import func, or_, desc
 
 from app.core.redis_cache_service import RedisCacheService
 from app.models import Category
 from app.models.book import Book, Author, Publisher, BookAuthor
-from app.schemas.book import BookCreate, BookUpdate, BookResponse, BookSearchParams
+from app.schemas.book import (
+    BookCreate, BookUpdate, BookResponse, BookSearchParams,
+    AuthorCreate, PublisherCreate, BulkUpsertItem, BulkUpsertResponse
+)
+from app.schemas.category import CategoryCreate
 from app.schemas.paginated_response import PaginatedResponse, paginate_query
+from app.utils.common_utils import json_response
 
 
 class BookService:
@@ -52,9 +57,31 @@ class BookService:
     def get_book(self, db: Session, book_id: int, pick_cache_if_available=False) -> Book:
         cache_key = f"book_id_:{book_id}"
 
-        cached_result = self.cache_service.get(cache_key)
-        if pick_cache_if_available and cached_result is not None:
-            return cached_result
+        if pick_cache_if_available:
+            cached_result = self.cache_service.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        book = self._load_book(db, book_id)
+        self.cache_service.set(cache_key, BookResponse.model_validate(book).model_dump_json())
+        return book
+
+    def get_book_json(self, db: Session, book_id: int) -> Response:
+        cache_key = f"book_id_:{book_id}"
+
+        cached_result = self.cache_service.get_raw(cache_key)
+        if cached_result is not None:
+            return json_response(cached_result)
+
+        book_json = BookResponse.model_validate(self._load_book(db, book_id)).model_dump_json()
+        self.cache_service.set(cache_key, book_json)
+        return json_response(book_json)
+
+    def invalidate_book_cache(self, *book_ids: int) -> None:
+        if book_ids:
+            self.cache_service.redis_client.delete(*[f"book_id_:{book_id}" for book_id in book_ids])
+
+    def _load_book(self, db: Session, book_id: int) -> Book:
         book = db.query(Book).options(
             joinedload(Book.category),
             joinedload(Book.publisher),
@@ -66,11 +93,6 @@ class BookService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Book with ID {book_id} not found"
             )
-
-        self.cache_service.set(
-            cache_key,
-            BookResponse.model_validate(book).model_dump(mode='json')
-        )
         return book
 
     def edit_book(self, db: Session, book_id: int, book_data: BookUpdate) -> Book:
@@ -107,6 +129,7 @@ class BookService:
 
         db.commit()
         db.refresh(db_book)
+        self.invalidate_book_cache(book_id)
         return db_book
 
     def delete_book(self, db: Session, book_id: int) -> None:
@@ -127,17 +150,18 @@ class BookService:
 
         db.delete(db_book)
         db.commit()
+        self.invalidate_book_cache(book_id)
 
     def search_books(self, db: Session, search_params: BookSearchParams, page: int = 1,
-                     items_per_page: int = 10) -> PaginatedResponse:
+                     items_per_page: int = 10) -> Response:
 
 
 
-        cache_key = f"book_search:{search_params.query.lower()}:{page}:{items_per_page}"
+        cache_key = f"book_search_page:{search_params.query.lower()}:{page}:{items_per_page}"
 
-        cached_result = self.cache_service.get(cache_key)
+        cached_result = self.cache_service.get_raw(cache_key)
         if cached_result:
-            return PaginatedResponse(**cached_result)
+            return json_response(cached_result)
 
         query = db.query(Book).options(
             joinedload(Book.category),
@@ -189,9 +213,6 @@ class BookService:
         limit = items_per_page
         has_more = (skip + limit) < total_count
 
-        # Calculate total pages
-        total_pages = (total_count + items_per_page - 1) // items_per_page
-
         # Create paginated response
         response = PaginatedResponse(
             data=book_responses,
@@ -201,63 +222,93 @@ class BookService:
             has_more=has_more
         )
 
-        # Cache the result
-        self.cache_service.set(
-            cache_key,
-            {
-                "items": [book.model_dump() for book in book_responses],
-                "total": total_count,
-                "page": page,
-                "items_per_page": items_per_page,
-                "pages": total_pages
-            }
-        )
+        # Cache the serialized result so hits are returned as is
+        response_json = response.model_dump_json()
+        self.cache_service.set(cache_key, response_json)
 
-        return response
+        return json_response(response_json)
 
     def add_author(self, db: Session, name: str, biography: Optional[str] = None) -> Author:
-        existing_author = db.query(Author).filter(Author.name == name).first()
-        if existing_author:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Author with name '{name}' already exists"
-            )
-
-        db_author = Author(name=name, biography=biography)
-        db.add(db_author)
-        db.commit()
-        db.refresh(db_author)
-        return db_author
-
-
+        return self._add_by_name(db, Author, Author.author_id, "Author", name=name, biography=biography)
 
     def add_publisher(self, db: Session, name: str, address: Optional[str] = None,
                       contact_info: Optional[str] = None) -> Publisher:
-        existing_publisher = db.query(Publisher).filter(Publisher.name == name).first()
-        if existing_publisher:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f"Publisher with name '{name}' already exists"
-            )
+        return self._add_by_name(db, Publisher, Publisher.publisher_id, "Publisher",
+                                 name=name, address=address, contact_info=contact_info)
 
-        db_publisher = Publisher(name=name, address=address, contact_info=contact_info)
-        db.add(db_publisher)
-        db.commit()
-        db.refresh(db_publisher)
-        return db_publisher
+    def add_category(self, db: Session, name: str, description: Optional[str] = None) -> Category:
+        return self._add_by_name(db, Category, Category.category_id, "Category", name=name, description=description)
 
+    def bulk_add_authors(self, db: Session, authors: List[AuthorCreate]) -> BulkUpsertResponse:
+        return self._bulk_upsert_by_name(db, Author, Author.author_id, [a.model_dump() for a in authors])
 
+    def bulk_add_publishers(self, db: Session, publishers: List[PublisherCreate]) -> BulkUpsertResponse:
+        return self._bulk_upsert_by_name(db, Publisher, Publisher.publisher_id, [p.model_dump() for p in publishers])
 
-    def add_category(self, db: Session, name: str, description: Optional[str] = None) -> Category:
-        existing_category = db.query(Category).filter(Category.name == name).first()
-        if existing_category:
+    def bulk_add_categories(self, db: Session, categories: List[CategoryCreate]) -> BulkUpsertResponse:
+        return self._bulk_upsert_by_name(db, Category, Category.category_id, [c.model_dump() for c in categories])
+
+    def _add_by_name(self, db: Session, model, id_column, label: str, **values):
+        if self._lock_existing_names(db, model, id_column, [values["name"]]):
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"Category with name '{name}' already exists"
+                detail=f"{label} with name '{values['name']}' already exists"
             )
 
-        db_category = Category(name=name, description=description)
-        db.add(db_category)
+        instance = model(**values)
+        db.add(instance)
+        db.commit()
+        db.refresh(instance)
+        return instance
+
+    def _bulk_upsert_by_name(self, db: Session, model, id_column, rows: List[dict]) -> BulkUpsertResponse:
+        """
+            Resolves names that already exist (the oldest row wins when a name is shared), then
+            inserts the rest in one statement, all in one transaction.
+        """
+        unique_rows = {}
+        for row in rows:
+            unique_rows.setdefault(row["name"], row)
+
+        existing = self._lock_existing_names(db, model, id_column, list(unique_rows))
+
+        ids = {}
+        new_rows = [row for name, row in unique_rows.items() if name not in existing]
+        if new_rows:
+            inserted = db.execute(insert(model).values(new_rows).returning(id_column, model.name)).all()
+            ids = {name: row_id for row_id, name in inserted}
         db.commit()
-        db.refresh(db_category)
-        return db_category
\ No newline at end of file
+
+        items = []
+        for name in unique_rows:
+            if name in ids:
+                items.append(BulkUpsertItem(id=ids[name], name=name, created=True))
+            else:
+                items.append(BulkUpsertItem(id=existing[name], name=name, created=False))
+
+        return BulkUpsertResponse(
+            items=items,
+            created=len(ids),
+            existing=len(existing)
+        )
+
+    def _lock_existing_names(self, db: Session, model, id_column, names: List[str]) -> dict:
+        """
+            {name: id} of the names that already exist, the oldest row's when a name is shared.
+            Names need not be unique, so a per-table advisory lock, held until the transaction
+            ends, keeps concurrent adds from inserting the same new name twice, and FOR SHARE
+            keeps matched rows from being deleted before the commit.
+        """
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(model.__tablename__))))
+        existing = {}
+        existing_rows = (
+            db.query(id_column, model.name)
+            .filter(model.name.in_(names))
+            .order_by(id_column)
+            .with_for_update(read=True)
+            .all()
+        )
+        for row_id, name in existing_rows:
+            existing.setdefault(name, row_id)
+        return existing
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.borrowing import Borrowing, BorrowingArchive
+from app.utils.constants import BorrowingStatus
+
+
+class BorrowingArchiveService:
+    """
+        Moves returned loans older than a cutoff from borrowings into borrowings_archive,
+        keeping the hot table (and its status/user/book indexes) down to recent rows.
+    """
+
+    COLUMNS = ("borrowing_id", "user_id", "book_id", "borrow_date", "due_date", "return_date", "status")
+
+    def archive_returned(self, db: Session, older_than_months: int) -> List[int]:
+        """
+            Deletes and re-inserts the rows in a single statement, so a loan is never in
+            both tables or in neither. Returns the user id of every archived loan.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=30 * older_than_months)
+
+        # borrow_date <= return_date, so the extra bound only lets Postgres prune partitions
+        moved = delete(Borrowing).where(
+            Borrowing.status == BorrowingStatus.RETURNED.value,
+            Borrowing.return_date < cutoff,
+            Borrowing.borrow_date < cutoff
+        ).returning(
+            *[getattr(Borrowing, column) for column in self.COLUMNS]
+        ).cte("moved")
+
+        user_ids = db.execute(
+            insert(BorrowingArchive).from_select(
+                list(self.COLUMNS),
+                select(*[moved.c[column] for column in self.COLUMNS])
+            ).returning(BorrowingArchive.user_id)
+        ).scalars().all()
+        db.commit()
+
+        return user_ids
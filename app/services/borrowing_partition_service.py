@@ -0,0 +1,182 @@
+import logging
+import threading
+from datetime import date, datetime
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.utils.constants import ACTIVE_BORROWING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(value: date, months: int = 0) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    return f"borrowings_y{start.year}m{start.month:02d}"
+
+
+class BorrowingPartitionService:
+    """
+        Maintains the monthly range partitions of borrowings (partitioned by borrow_date).
+
+        Upcoming months are created ahead of time so inserts never land in the default
+        partition, and months whose loans are all closed can be detached into standalone
+        tables that hot queries no longer scan. A background thread repeats ensure_partitions
+        every BORROWINGS_PARTITION_CHECK_SECONDS, and rows that still reached the default
+        partition are moved into their month when it is created.
+    """
+
+    PARENT = "borrowings"
+    DEFAULT_PARTITION = "borrowings_default"
+
+    def __init__(self):
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def is_partitioned(self, db: Session) -> bool:
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        return db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent)"
+        ), {"parent": self.PARENT}).first() is not None
+
+    def ensure_partitions(self, db: Session, months_ahead: int = None) -> List[str]:
+        """
+            Creates the default partition and one partition per month from the current
+            month up to months_ahead. Returns the names of partitions that were created.
+        """
+        if not self.is_partitioned(db):
+            return []
+
+        if months_ahead is None:
+            months_ahead = settings.BORROWINGS_PARTITION_MONTHS_AHEAD
+
+        # every worker runs this; the lock keeps them from racing on the same CREATE TABLE
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:parent))"), {"parent": self.PARENT})
+        existing = set(self.list_partitions(db))
+        created = []
+        if self.DEFAULT_PARTITION not in existing:
+            db.execute(text(f"CREATE TABLE {self.DEFAULT_PARTITION} PARTITION OF {self.PARENT} DEFAULT"))
+            created.append(self.DEFAULT_PARTITION)
+
+        current = month_start(datetime.utcnow().date())
+        months = {month_start(current, offset) for offset in range(months_ahead + 1)}
+        stranded = set()
+        if self.DEFAULT_PARTITION in existing:
+            stranded = {month.date() for (month,) in db.execute(text(
+                f"SELECT DISTINCT date_trunc('month', borrow_date) FROM {self.DEFAULT_PARTITION}"
+            ))}
+        missing = sorted(start for start in months | stranded if partition_name(start) not in existing)
+
+        # a month with rows in the default partition cannot be created while they are there,
+        # so the default is detached, the rows are moved into their new month, and it is reattached
+        stranded &= set(missing)
+        if stranded:
+            db.execute(text(f"ALTER TABLE {self.PARENT} DETACH PARTITION {self.DEFAULT_PARTITION}"))
+
+        for start in missing:
+            name = partition_name(start)
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {self.PARENT} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{month_start(start, 1).isoformat()}')"
+            ))
+            created.append(name)
+            if start in stranded:
+                moved = db.execute(text(
+                    f"WITH moved AS (DELETE FROM {self.DEFAULT_PARTITION} "
+                    f"WHERE borrow_date >= :start AND borrow_date < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ), {"start": start, "end": month_start(start, 1)}).rowcount
+                logger.warning(f"Moved {moved} borrowings from {self.DEFAULT_PARTITION} into {name}")
+
+        if stranded:
+            db.execute(text(f"ALTER TABLE {self.PARENT} ATTACH PARTITION {self.DEFAULT_PARTITION} DEFAULT"))
+
+        db.commit()
+        if created:
+            logger.info(f"Created borrowings partitions: {', '.join(created)}")
+        return created
+
+    def list_partitions(self, db: Session) -> List[str]:
+        rows = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent) "
+            "ORDER BY c.relname"
+        ), {"parent": self.PARENT}).all()
+        return [name for (name,) in rows]
+
+    def detach_partitions(self, db: Session, older_than_months: int) -> Tuple[List[str], Set[int]]:
+        """
+            Detaches monthly partitions that end before the cutoff and hold no active loans.
+            Detached tables keep their rows and can be archived or dropped separately.
+            Returns the detached partitions and the users whose history lost rows.
+        """
+        if not self.is_partitioned(db):
+            return [], set()
+
+        cutoff = month_start(datetime.utcnow().date(), -older_than_months)
+        detached = []
+        user_ids: Set[int] = set()
+        for name in self.list_partitions(db):
+            if name == self.DEFAULT_PARTITION:
+                continue
+            start = datetime.strptime(name[len("borrowings_"):], "y%Ym%m").date()
+            if month_start(start, 1) > cutoff:
+                continue
+
+            # blocks status edits until the detach commits, so no loan turns active in between
+            db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+            has_active = db.execute(text(
+                f"SELECT 1 FROM {name} WHERE status = ANY(:statuses) LIMIT 1"
+            ), {"statuses": list(ACTIVE_BORROWING_STATUSES)}).first()
+            if has_active:
+                logger.info(f"Keeping partition {name}: it still has active loans")
+                continue
+
+            user_ids.update(user_id for (user_id,) in db.execute(text(f"SELECT DISTINCT user_id FROM {name}")))
+            db.execute(text(f"ALTER TABLE {self.PARENT} DETACH PARTITION {name}"))
+            detached.append(name)
+
+        if user_ids:
+            # only closed loans left, but recount anyway so the counters match what is still attached
+            db.execute(text(
+                f"UPDATE users SET active_loans = ("
+                f"SELECT count(*) FROM {self.PARENT} b "
+                f"WHERE b.user_id = users.user_id AND b.status = ANY(:statuses)"
+                f") WHERE user_id = ANY(:user_ids)"
+            ), {"statuses": list(ACTIVE_BORROWING_STATUSES), "user_ids": list(user_ids)})
+
+        db.commit()
+        return detached, user_ids
+
+    def start(self) -> None:
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self._run, name="borrowing-partitions", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        if self.__thread and self.__thread.is_alive():
+            self.__thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self.__stop_event.wait(settings.BORROWINGS_PARTITION_CHECK_SECONDS):
+            db = SessionLocal()
+            try:
+                self.ensure_partitions(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Could not create borrowings partitions: {str(e)}")
+            finally:
+                db.close()
+
+
+borrowing_partitions = BorrowingPartitionService()
@@ -1,41 +1,107 @@
 from dns.e164 import query
 from fastapi import HTTPException, status,BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, asc, and_, func
-from typing import List, Optional
+from sqlalchemy import desc, asc, and_, or_, func, case, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Dict, List, NamedTuple, Optional
 from datetime import datetime, timedelta
+from collections import Counter
+import time
 
+from app.core.cache_stats import CacheStats
 from app.core.redis_cache_service import RedisCacheService
-from app.models import Borrowing
+from app.models import Borrowing, BorrowingArchive, User
 from app.models.book import Book, BookAuthor, Author
 from app.models.books_queue import BookRequestQueue
-from app.schemas.book_request import BookRequestResponse
-from app.schemas.borrowing import BorrowingCreate, BorrowingWithBookInfo, BorrowingHistory, BorrowingUpdate
+from app.schemas.book_request import BookRequestResponse, QueuePositionResponse
+from app.schemas.borrowing import (
+    BorrowingCreate, BorrowingWithBookInfo, BorrowingHistory, BorrowingUpdate,
+    BorrowingInDB, BulkBorrowingItemResult, BulkBorrowingResponse, borrowing_with_book_info_list
+)
 from app.schemas.paginated_response import PaginatedResponse
+from app.services.book_request_event_service import book_request_events
 from app.services.book_service import BookService
+from app.services.borrowing_archive_service import BorrowingArchiveService
+from app.services.borrowing_partition_service import BorrowingPartitionService
+from app.services.hold_allocation_service import HoldAllocationService
+from app.services.loan_policy_service import LoanPolicyService
 from app.services.notification_service import NotificationService
-from app.utils.constants import BorrowingStatus, RequestStatus
+from app.services.request_queue_mirror_service import RequestQueueMirrorService
+from app.utils.constants import (
+    BorrowingStatus, RequestStatus, LOAN_PERIOD_DAYS, USER_BORROWINGS_CACHE_TTL, ACTIVE_BORROWING_STATUSES,
+    USER_ACCESS_LEVEL, LIBRARIAN_ACCESS_LEVEL
+)
+
+user_borrowings_cache_stats = CacheStats("user_borrowings")
+
+# caches a history only if no invalidation bumped the user's generation since it was read
+_FILL_IF_CURRENT_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+class CachedJson(NamedTuple):
+    body: bytes | str
+    hit: bool
+    elapsed: float
 
 
 class BorrowingService:
     def __init__(self):
         self.__book_service=BookService()
         self.__notification_service=NotificationService()
+        self.__queue_mirror=RequestQueueMirrorService()
+        self.__hold_service=HoldAllocationService(self.__notification_service, self.__queue_mirror,
+                                                  self.__book_service)
+        self.__cache_service=RedisCacheService(default_ttl=USER_BORROWINGS_CACHE_TTL)
+        self.__loan_policy=LoanPolicyService()
+        self.__archive_service=BorrowingArchiveService()
+        self.__partition_service=BorrowingPartitionService()
+        self.__fill_if_current=self.__cache_service.redis_client.register_script(_FILL_IF_CURRENT_SCRIPT)
+
+    def borrow_book(self, db: Session, user_id: int, borrowing_data: BorrowingCreate,
+                    access_level: int = USER_ACCESS_LEVEL) -> Borrowing:
+        # the first statement locks the user's row, so the limit check sees every committed loan
+        # and a concurrent borrow by the same user waits for this one to finish
+        active_loans = db.execute(
+            update(User).where(
+                User.user_id == user_id
+            ).values(
+                active_loans=User.active_loans + 1
+            ).returning(User.active_loans)
+        ).scalar_one()
+        self.__loan_policy.enforce(db, user_id, access_level, active_loans=active_loans - 1)
+
+        book = db.query(Book).filter(Book.book_id == borrowing_data.book_id).first()
+        if not book:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Book with ID {borrowing_data.book_id} not found"
+            )
 
-    def borrow_book(self, db: Session, user_id: int, borrowing_data: BorrowingCreate) -> Borrowing:
-        book = self.__book_service.get_book(db, borrowing_data.book_id)
+        # a reserved hold already took its copy out of available_copies
+        hold = self.__hold_service.get_active_holds(db, user_id, [book.book_id]).get(book.book_id)
 
-        if book.available_copies <= 0:
-            self._add_to_request_queue(db,user_id=user_id, book=book)
+        if hold is None and book.available_copies <= 0:
+            # undo the loan count before the queue entry is committed
+            db.rollback()
+            self._add_to_request_queue(db,user_id=user_id, book_id=borrowing_data.book_id)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Book is not available for borrowing"
             )
 
-        existing_borrowing = db.query(Borrowing).filter(
+        # active_loans is only a counter, so the lookup always runs; the users row lock taken
+        # above makes a concurrent duplicate visible here
+        existing_borrowing = db.query(Borrowing.borrowing_id).filter(
             Borrowing.user_id == user_id,
             Borrowing.book_id == borrowing_data.book_id,
-            Borrowing.status.in_([BorrowingStatus.BORROWED, BorrowingStatus.OVERDUE])
+            Borrowing.status.in_(ACTIVE_BORROWING_STATUSES)
         ).first()
 
         if existing_borrowing:
@@ -48,58 +114,53 @@ class BorrowingService:
             user_id=user_id,
             book_id=borrowing_data.book_id,
             borrow_date=datetime.utcnow(),
-            due_date=datetime.utcnow() + timedelta(days=14),
+            due_date=datetime.utcnow() + timedelta(days=LOAN_PERIOD_DAYS),
             status=BorrowingStatus.BORROWED.value,
 
         )
 
-        book.available_copies -= 1
+        if hold is None:
+            book.available_copies -= 1
+        else:
+            hold.status = RequestStatus.FULFILLED.value
+        book.total_loans = Book.total_loans + 1
 
         db.add(borrowing)
         db.commit()
         db.refresh(borrowing)
+        self._invalidate_user_borrowings(user_id)
+        self.__book_service.invalidate_book_cache(borrowing_data.book_id)
 
         return borrowing
 
-    def _add_to_request_queue(self, db: Session, user_id: int, book: Book) -> BookRequestResponse:
-
-        queue_entry = db.query(BookRequestQueue).filter(
-            BookRequestQueue.user_id == user_id,
-            BookRequestQueue.book_id == book.book_id,
-            BookRequestQueue.status == RequestStatus.PENDING.value
-        ).first()
-
-        if queue_entry is None:
-
-            queue_entry = BookRequestQueue(
+    def _add_to_request_queue(self, db: Session, user_id: int, book_id: int) -> Optional[BookRequestResponse]:
+        # the partial unique index on pending (user_id, book_id) turns re-enrollment into a no-op
+        queue_entry = db.execute(
+            pg_insert(BookRequestQueue).values(
                 user_id=user_id,
-                book_id=book.book_id,
+                book_id=book_id,
                 request_date=datetime.utcnow(),
                 status=RequestStatus.PENDING.value,
                 notification_sent=False
+            ).on_conflict_do_nothing(
+                index_elements=[BookRequestQueue.user_id, BookRequestQueue.book_id],
+                index_where=text(f"status = '{RequestStatus.PENDING.value}'")
+            ).returning(
+                BookRequestQueue.request_id,
+                BookRequestQueue.request_date,
+                BookRequestQueue.status
             )
+        ).first()
+        db.commit()
 
-            db.add(queue_entry)
-            db.commit()
-            db.refresh(queue_entry)
-
-            book_key = f"book_request:{book.book_id}"
-            book_data = {
-                "title": book.title,
-                "isbn": book.isbn,
-                "book_id": str(book.book_id),
-                "authors": ",".join([author.author.name for author in book.authors]) if book.authors else "",
-                "publisher": book.publisher.name if book.publisher else "",
-                "category": book.category.name if book.category else ""
-            }
-
-
-            self.__notification_service.redis_client.hset(book_key, mapping=book_data)
+        if queue_entry is None:
+            return None
 
+        book_request_events.publish(book_id, user_id, queue_entry.request_date, queue_entry.request_id)
 
         return BookRequestResponse(
             request_id=queue_entry.request_id,
-            book_id=book.book_id,
+            book_id=book_id,
             user_id=user_id,
             request_date=queue_entry.request_date,
             status=queue_entry.status,
@@ -107,6 +168,8 @@ class BorrowingService:
         )
 
     def update_borrowing(self, db: Session, borrowing_id: int, update_data: BorrowingUpdate) -> Borrowing:
+        loan_delta = overdue_delta = 0
+        copy_released = False
         borrowing = db.query(Borrowing).filter(
             Borrowing.borrowing_id == borrowing_id
         ).first()
@@ -126,13 +189,20 @@ class BorrowingService:
             if old_status != BorrowingStatus.RETURNED.value and new_status == BorrowingStatus.RETURNED.value:
                 borrowing.return_date = datetime.utcnow()
                 book = self.__book_service.get_book(db, borrowing.book_id)
-                book.available_copies += 1
+                copy_released = book.available_copies < book.total_copies
+                if copy_released:
+                    book.available_copies += 1
 
             # If changing from returned to non-returned
             elif old_status == BorrowingStatus.RETURNED.value and new_status != BorrowingStatus.RETURNED.value:
                 book = self.__book_service.get_book(db, borrowing.book_id)
                 book.available_copies -= 1
 
+            loan_delta = int(new_status in ACTIVE_BORROWING_STATUSES) - int(old_status in ACTIVE_BORROWING_STATUSES)
+            overdue_delta = int(new_status == BorrowingStatus.OVERDUE.value) - int(old_status == BorrowingStatus.OVERDUE.value)
+            if loan_delta:
+                self._adjust_active_loans(db, {borrowing.user_id: loan_delta})
+
             borrowing.status = new_status
 
         # Update due date if provided
@@ -141,6 +211,12 @@ class BorrowingService:
 
         db.commit()
         db.refresh(borrowing)
+        self._invalidate_user_borrowings(borrowing.user_id)
+        self.__book_service.invalidate_book_cache(borrowing.book_id)
+        self.__loan_policy.apply(overdue={borrowing.user_id: overdue_delta})
+
+        if copy_released:
+            self.__hold_service.allocate(db, [borrowing.book_id])
 
         return borrowing
 
@@ -163,59 +239,214 @@ class BorrowingService:
             )
 
 
+        loan_delta = -int(borrowing.status in ACTIVE_BORROWING_STATUSES)
+        overdue_delta = -int(borrowing.status == BorrowingStatus.OVERDUE.value)
+        if loan_delta:
+            self._adjust_active_loans(db, {borrowing.user_id: loan_delta})
+
         borrowing.status = BorrowingStatus.RETURNED.value
         borrowing.return_date = datetime.utcnow()
 
 
         book = self.__book_service.get_book(db, borrowing.book_id)
 
-        if book.available_copies<book.total_copies:
+        copy_released = book.available_copies < book.total_copies
+        if copy_released:
             book.available_copies += 1
 
 
         db.commit()
         db.refresh(borrowing)
+        self._invalidate_user_borrowings(borrowing.user_id)
+        self.__book_service.invalidate_book_cache(book.book_id)
+        self.__loan_policy.apply(overdue={borrowing.user_id: overdue_delta})
 
 
-        self._process_next_request_in_queue(db, book.book_id)
+        if copy_released:
+            self.__hold_service.allocate(db, [book.book_id])
 
 
         return borrowing
 
-    def _process_next_request_in_queue(self, db_session: Session, book_id: int) -> None:
+    def bulk_borrow_books(self, db: Session, user_id: int, book_ids: List[int],
+                          access_level: int = USER_ACCESS_LEVEL) -> BulkBorrowingResponse:
+        """
+            Checks out a whole cart in one transaction. Books are locked and validated together,
+            copies are decremented with a single UPDATE, and each item gets its own result.
+            Items beyond the user's remaining loan allowance fail individually.
+        """
+        # locked until commit, so concurrent carts of the same user cannot both use the allowance
+        active_loans = db.query(User.active_loans).filter(User.user_id == user_id).with_for_update().scalar()
+        allowed, limit_reason = self.__loan_policy.allowance(db, user_id, access_level, active_loans)
+        if allowed < 1:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=limit_reason
+            )
+        book_ids = list(dict.fromkeys(book_ids))
+
+        books = {
+            book.book_id: book for book in
+            db.query(Book).filter(Book.book_id.in_(book_ids)).with_for_update().all()
+        }
+        active_book_ids = {
+            book_id for (book_id,) in db.query(Borrowing.book_id).filter(
+                Borrowing.user_id == user_id,
+                Borrowing.book_id.in_(book_ids),
+                Borrowing.status.in_([BorrowingStatus.BORROWED.value, BorrowingStatus.OVERDUE.value])
+            ).all()
+        }
+        holds = self.__hold_service.get_active_holds(db, user_id, book_ids)
 
-        next_request = db_session.query(BookRequestQueue).filter(
-            BookRequestQueue.book_id == book_id,
-            BookRequestQueue.status == RequestStatus.PENDING.value
-        ).order_by(
-            BookRequestQueue.request_date
-        ).first()
+        now = datetime.utcnow()
+        results = {}
+        borrowings = []
+        for book_id in book_ids:
+            book = books.get(book_id)
+            if book is None:
+                results[book_id] = BulkBorrowingItemResult(book_id=book_id, success=False,
+                                                           detail=f"Book with ID {book_id} not found")
+            elif book_id in active_book_ids:
+                results[book_id] = BulkBorrowingItemResult(book_id=book_id, success=False,
+                                                           detail="User already has an active borrowing for this book")
+            elif book_id not in holds and book.available_copies <= 0:
+                results[book_id] = BulkBorrowingItemResult(book_id=book_id, success=False,
+                                                           detail="Book is not available for borrowing")
+            elif len(borrowings) >= allowed:
+                results[book_id] = BulkBorrowingItemResult(book_id=book_id, success=False,
+                                                           detail=limit_reason)
+            else:
+                borrowings.append(Borrowing(
+                    user_id=user_id,
+                    book_id=book_id,
+                    borrow_date=now,
+                    due_date=now + timedelta(days=LOAN_PERIOD_DAYS),
+                    status=BorrowingStatus.BORROWED.value,
+                ))
+
+        if borrowings:
+            db.add_all(borrowings)
+            db.query(Book).filter(
+                Book.book_id.in_([b.book_id for b in borrowings])
+            ).update(
+                {
+                    Book.available_copies: Book.available_copies - case(
+                        (Book.book_id.in_(list(holds)), 0), else_=1
+                    ),
+                    Book.total_loans: Book.total_loans + 1
+                },
+                synchronize_session=False
+            )
+            self._adjust_active_loans(db, {user_id: len(borrowings)})
+            for borrowing in borrowings:
+                if borrowing.book_id in holds:
+                    holds[borrowing.book_id].status = RequestStatus.FULFILLED.value
+            db.flush()
+
+        for borrowing in borrowings:
+            results[borrowing.book_id] = BulkBorrowingItemResult(
+                book_id=borrowing.book_id,
+                borrowing_id=borrowing.borrowing_id,
+                success=True,
+                borrowing=BorrowingInDB.model_validate(borrowing)
+            )
 
-        if not next_request:
-            return
+        db.commit()
+        if borrowings:
+            self._invalidate_user_borrowings(user_id)
+            self.__book_service.invalidate_book_cache(*[b.book_id for b in borrowings])
+
+        return BulkBorrowingResponse(
+            results=[results[book_id] for book_id in book_ids],
+            succeeded=len(borrowings),
+            failed=len(book_ids) - len(borrowings)
+        )
+
+    def bulk_return_books(self, db: Session, borrowing_ids: List[int], user_id: int,
+                          access_level: int = USER_ACCESS_LEVEL) -> BulkBorrowingResponse:
+        """
+            Checks in a whole cart in one transaction. Copies are restored per book with a single
+            UPDATE and the request queue is processed once for every affected book. Below librarian
+            level only the caller's own borrowings are returned; other IDs are reported as failures.
+        """
+        borrowing_ids = list(dict.fromkeys(borrowing_ids))
 
+        query = db.query(Borrowing).filter(Borrowing.borrowing_id.in_(borrowing_ids))
+        if access_level < LIBRARIAN_ACCESS_LEVEL:
+            query = query.filter(Borrowing.user_id == user_id)
+        borrowings = {borrowing.borrowing_id: borrowing for borrowing in query.with_for_update().all()}
 
-        next_request.notification_sent = True
-        db_session.commit()
+        now = datetime.utcnow()
+        results = {}
+        returned = []
+        released_per_user = Counter()
+        overdue_per_user = Counter()
+        for borrowing_id in borrowing_ids:
+            borrowing = borrowings.get(borrowing_id)
+            if borrowing is None:
+                results[borrowing_id] = BulkBorrowingItemResult(
+                    borrowing_id=borrowing_id, success=False,
+                    detail=f"Borrowing record with ID {borrowing_id} not found")
+            elif borrowing.status == BorrowingStatus.RETURNED.value:
+                results[borrowing_id] = BulkBorrowingItemResult(
+                    borrowing_id=borrowing_id, book_id=borrowing.book_id, success=False,
+                    detail="This book has already been returned")
+            else:
+                if borrowing.status in ACTIVE_BORROWING_STATUSES:
+                    released_per_user[borrowing.user_id] -= 1
+                if borrowing.status == BorrowingStatus.OVERDUE.value:
+                    overdue_per_user[borrowing.user_id] -= 1
+                borrowing.status = BorrowingStatus.RETURNED.value
+                borrowing.return_date = now
+                returned.append(borrowing)
+
+        if released_per_user:
+            self._adjust_active_loans(db, released_per_user)
+
+        returned_per_book = Counter(borrowing.book_id for borrowing in returned)
+        if returned_per_book:
+            db.query(Book).filter(
+                Book.book_id.in_(list(returned_per_book))
+            ).update(
+                {Book.available_copies: func.least(
+                    Book.total_copies,
+                    Book.available_copies + case(returned_per_book, value=Book.book_id, else_=0)
+                )},
+                synchronize_session=False
+            )
 
+        for borrowing in returned:
+            results[borrowing.borrowing_id] = BulkBorrowingItemResult(
+                borrowing_id=borrowing.borrowing_id,
+                book_id=borrowing.book_id,
+                success=True,
+                borrowing=BorrowingInDB.model_validate(borrowing)
+            )
 
-        self.__notification_service.notify_book_available(
-            user_id=next_request.user_id,
-            book_id=book_id,
-            request_id=next_request.request_id
+        db.commit()
+        self._invalidate_user_borrowings(*{borrowing.user_id for borrowing in returned})
+        self.__book_service.invalidate_book_cache(*returned_per_book)
+        self.__loan_policy.apply(overdue=overdue_per_user)
+
+        if returned_per_book:
+            self.__hold_service.allocate(db, list(returned_per_book))
+
+        return BulkBorrowingResponse(
+            results=[results[borrowing_id] for borrowing_id in borrowing_ids],
+            succeeded=len(returned),
+            failed=len(borrowing_ids) - len(returned)
         )
 
-    def _update_overdue_status(self, db: Session) -> None:
-        now = datetime.utcnow()
-        overdue_borrowings = db.query(Borrowing).filter(
-            Borrowing.status == BorrowingStatus.BORROWED,
-            Borrowing.due_date < now
-        ).all()
-        for borrowing in overdue_borrowings:
-            borrowing.status = BorrowingStatus.OVERDUE
+    def _adjust_active_loans(self, db: Session, deltas: Dict[int, int]) -> None:
+        db.query(User).filter(
+            User.user_id.in_(list(deltas))
+        ).update(
+            {User.active_loans: User.active_loans + case(deltas, value=User.user_id, else_=0)},
+            synchronize_session=False
+        )
 
-        if overdue_borrowings:
-            db.commit()
+    def _update_overdue_status(self, db: Session) -> None:
+        self.update_overdue_status(db)
 
     def update_overdue_status(self, db: Session) -> int:
 
@@ -231,15 +462,55 @@ class BorrowingService:
 
         if count > 0:
             db.commit()
+            overdue_per_user = Counter(borrowing.user_id for borrowing in overdue_borrowings)
+            self._invalidate_user_borrowings(*overdue_per_user)
+            self.__loan_policy.apply(overdue=overdue_per_user)
 
         return count
 
+    def archive_returned_borrowings(self, db: Session, older_than_months: int) -> int:
+        user_ids = self.__archive_service.archive_returned(db, older_than_months)
+        self._invalidate_user_borrowings(*set(user_ids))
+        return len(user_ids)
+
+    def detach_borrowing_partitions(self, db: Session, older_than_months: int) -> List[str]:
+        detached, user_ids = self.__partition_service.detach_partitions(db, older_than_months)
+        self._invalidate_user_borrowings(*user_ids)
+        return detached
+
+    def expire_holds(self, db: Session) -> int:
+        return self.__hold_service.expire_holds(db)
+
+    def get_queue_position(self, db: Session, book_id: int, user_id: int) -> QueuePositionResponse:
+        queued = self.__queue_mirror.position(book_id, user_id)
+        if queued is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="You are not in the request queue for this book"
+            )
+        position, queue_length = queued
+
+        # the book cache is invalidated whenever total_copies changes, so the estimate follows edits
+        book = self.__book_service.get_book(db, book_id, pick_cache_if_available=True)
+        total_copies = book["total_copies"] if isinstance(book, dict) else book.total_copies
+        return QueuePositionResponse(
+            book_id=book_id,
+            position=position,
+            queue_length=queue_length,
+            estimated_wait_days=self.__queue_mirror.estimated_wait_days(position, total_copies)
+        )
+
+    def reconcile_request_queues(self, db: Session) -> int:
+        return self.__queue_mirror.reconcile(db)
+
     def get_borrowing(self, db: Session, borrowing_id: int) -> Borrowing:
 
         borrowing = db.query(Borrowing).filter(
             Borrowing.borrowing_id == borrowing_id
         ).options(
-            joinedload(Borrowing.book)
+            joinedload(Borrowing.book).joinedload(Book.category),
+            joinedload(Borrowing.book).joinedload(Book.publisher),
+            joinedload(Borrowing.book).joinedload(Book.authors).joinedload(BookAuthor.author)
         ).first()
 
         if not borrowing:
@@ -250,170 +521,177 @@ class BorrowingService:
 
         return borrowing
 
-    def get_user_borrowings(self, db: Session, user_id: int) -> BorrowingHistory:
-        #
-        author_subquery = db.query(
-            BookAuthor.book_id,
-            func.string_agg(Author.name, ', ').label('author_names')
-        ).join(
-            Author, BookAuthor.author_id == Author.author_id
-        ).group_by(
-            BookAuthor.book_id
-        ).subquery()
-
-        current_borrowings = db.query(
-            Borrowing,
-            Book.title.label("book_title"),
-            author_subquery.c.author_names.label("book_authors"),
-            Book.isbn.label("book_isbn")
+    def _borrowing_with_book_info_query(self, db: Session, source=Borrowing):
+        """
+            Selects plain columns shaped like BorrowingWithBookInfo, so rows can be validated
+            in bulk without materialising ORM instances. source may be Borrowing or BorrowingArchive.
+        """
+        # correlated per returned row, instead of aggregating authors for every book in the catalogue
+        author_names = db.query(
+            func.string_agg(Author.name, ', ')
         ).join(
-            Book, Borrowing.book_id == Book.book_id
-        ).outerjoin(
-            author_subquery, Book.book_id == author_subquery.c.book_id
+            BookAuthor, BookAuthor.author_id == Author.author_id
         ).filter(
-            Borrowing.user_id == user_id,
-            Borrowing.status.in_([BorrowingStatus.BORROWED.value, BorrowingStatus.OVERDUE.value])
-        ).order_by(
-            Borrowing.due_date
-        ).all()
-
-        past_borrowings = db.query(
-            Borrowing,
+            BookAuthor.book_id == Book.book_id
+        ).correlate(
+            Book
+        ).scalar_subquery()
+
+        return db.query(
+            source.borrowing_id,
+            source.user_id,
+            source.book_id,
+            source.borrow_date,
+            source.due_date,
+            source.return_date,
+            source.status,
             Book.title.label("book_title"),
-            author_subquery.c.author_names.label("book_authors"),
+            func.coalesce(author_names, "").label("book_authors"),
             Book.isbn.label("book_isbn")
         ).join(
-            Book, Borrowing.book_id == Book.book_id
-        ).outerjoin(
-            author_subquery, Book.book_id == author_subquery.c.book_id
-        ).filter(
+            Book, source.book_id == Book.book_id
+        )
+
+    @staticmethod
+    def _validate_borrowing_rows(rows) -> List[BorrowingWithBookInfo]:
+        return borrowing_with_book_info_list.validate_python([row._asdict() for row in rows])
+
+    def get_user_borrowings(self, db: Session, user_id: int, past_limit: Optional[int] = None,
+                            include_archive: bool = False) -> BorrowingHistory:
+        """
+            Fetches current and past borrowings in one query. Rows come back with current loans
+            first (by due date) and returned loans after (newest first), so both lists fall out
+            of a single pass. past_limit caps the returned history inside the same query.
+            include_archive merges archived loans into the history with one more query.
+        """
+        returned = Borrowing.status == BorrowingStatus.RETURNED.value
+        query = self._borrowing_with_book_info_query(db).filter(
             Borrowing.user_id == user_id,
-            Borrowing.status == BorrowingStatus.RETURNED.value
-        ).order_by(
-            desc(Borrowing.return_date)
+            Borrowing.status.in_([BorrowingStatus.BORROWED.value, BorrowingStatus.OVERDUE.value,
+                                  BorrowingStatus.RETURNED.value])
+        )
+        due_date, return_date = Borrowing.due_date, Borrowing.return_date
+
+        if past_limit is not None:
+            ranked = query.add_columns(
+                func.row_number().over(
+                    partition_by=returned,
+                    order_by=desc(Borrowing.return_date)
+                ).label("history_rank")
+            ).subquery()
+            returned = ranked.c.status == BorrowingStatus.RETURNED.value
+            query = db.query(
+                *[column for column in ranked.c if column.name != "history_rank"]
+            ).filter(
+                or_(~returned, ranked.c.history_rank <= past_limit)
+            )
+            due_date, return_date = ranked.c.due_date, ranked.c.return_date
+
+        rows = query.order_by(
+            case((returned, 1), else_=0),
+            case((~returned, due_date)),
+            desc(return_date)
         ).all()
 
-        current_results = []
-        for b, title, authors, isbn in current_borrowings:
-            borrowing_dict = {
-                **b.__dict__,
-                "book_title": title,
-                "book_authors": authors or "",
-                "book_isbn": isbn
-            }
-            current_results.append(BorrowingWithBookInfo(**borrowing_dict))
-
-        past_results = []
-        for b, title, authors, isbn in past_borrowings:
-            borrowing_dict = {
-                **b.__dict__,
-                "book_title": title,
-                "book_authors": authors or "",
-                "book_isbn": isbn
-            }
-            past_results.append(BorrowingWithBookInfo(**borrowing_dict))
+        current_borrowings, past_borrowings = [], []
+        for row in rows:
+            if row.status == BorrowingStatus.RETURNED.value:
+                past_borrowings.append(row)
+            else:
+                current_borrowings.append(row)
+
+        if include_archive:
+            archived = self._borrowing_with_book_info_query(db, BorrowingArchive).filter(
+                BorrowingArchive.user_id == user_id
+            ).order_by(
+                desc(BorrowingArchive.return_date)
+            ).limit(past_limit).all()
+            past_borrowings = sorted(past_borrowings + archived, key=lambda row: row.return_date, reverse=True)
+            if past_limit is not None:
+                past_borrowings = past_borrowings[:past_limit]
 
         return BorrowingHistory(
-            current_borrowings=current_results,
-            past_borrowings=past_results
+            current_borrowings=self._validate_borrowing_rows(current_borrowings),
+            past_borrowings=self._validate_borrowing_rows(past_borrowings)
         )
 
+    def get_user_borrowings_json(self, db: Session, user_id: int, past_limit: Optional[int] = None,
+                                 include_archive: bool = False) -> CachedJson:
+        """
+            Serves the user's BorrowingHistory JSON from a per-user Redis hash (one field per
+            past_limit), which borrow/return/update paths drop. Every drop also bumps the user's
+            generation key, and a miss only stores what it read if the generation is unchanged.
+        """
+        cache_key = f"user_borrowings:{user_id}"
+        generation_key = f"user_borrowings_gen:{user_id}"
+        field = str(past_limit or "all") + (":archive" if include_archive else "")
+
+        start = time.perf_counter()
+        pipe = self.__cache_service.raw_redis_client.pipeline(transaction=False)
+        pipe.hget(cache_key, field)
+        pipe.get(generation_key)
+        cached_result, generation = pipe.execute()
+        if cached_result is not None:
+            elapsed = time.perf_counter() - start
+            user_borrowings_cache_stats.record_hit(elapsed)
+            return CachedJson(cached_result, True, elapsed)
+
+        user_borrowings_cache_stats.record_miss()
+        history_json = self.get_user_borrowings(
+            db, user_id, past_limit=past_limit, include_archive=include_archive
+        ).model_dump_json()
+
+        self.__fill_if_current(
+            keys=[cache_key, generation_key],
+            args=[generation or b"", field, history_json, self.__cache_service.default_ttl]
+        )
+        return CachedJson(history_json, False, time.perf_counter() - start)
+
+    def _invalidate_user_borrowings(self, *user_ids: int) -> None:
+        if not user_ids:
+            return
+        pipe = self.__cache_service.redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.incr(f"user_borrowings_gen:{user_id}")
+            pipe.expire(f"user_borrowings_gen:{user_id}", self.__cache_service.default_ttl)
+        pipe.delete(*[f"user_borrowings:{user_id}" for user_id in user_ids])
+        pipe.execute()
+
     def get_overdue_borrowings(self, db: Session) -> List[BorrowingWithBookInfo]:
-        print("searching")
         self._update_overdue_status(db)
 
-        # Create a subquery to get author names for each book
-        author_subquery = db.query(
-            BookAuthor.book_id,
-            func.string_agg(Author.name, ', ').label('author_names')
-        ).join(
-            Author, BookAuthor.author_id == Author.author_id
-        ).group_by(
-            BookAuthor.book_id
-        ).subquery()
-
-        # Query for overdue borrowings with book information
-        overdue_borrowings = db.query(
-            Borrowing,
-            Book.title.label("book_title"),
-            author_subquery.c.author_names.label("book_authors"),
-            Book.isbn.label("book_isbn")
-        ).join(
-            Book, Borrowing.book_id == Book.book_id
-        ).outerjoin(
-            author_subquery, Book.book_id == author_subquery.c.book_id
-        ).filter(
+        overdue_borrowings = self._borrowing_with_book_info_query(db).filter(
             Borrowing.status == BorrowingStatus.OVERDUE.value
         ).order_by(
             Borrowing.due_date
         ).all()
 
-        # Process results
-        results = []
-        for row in overdue_borrowings:
-            # Extract the borrowing object and additional fields
-            borrowing, title, authors, isbn = row
-
-            # Convert the SQLAlchemy model to a dictionary
-            borrowing_dict = {}
-            for column in borrowing.__table__.columns:
-                column_name = column.name
-                borrowing_dict[column_name] = getattr(borrowing, column_name)
-
-            # Add the book information
-            borrowing_dict["book_title"] = title or ""
-            borrowing_dict["book_authors"] = authors or ""
-            borrowing_dict["book_isbn"] = isbn or ""
-
-            # Create the response model
-            try:
-                response_model = BorrowingWithBookInfo.model_validate(borrowing_dict)
-                results.append(response_model)
-            except Exception as e:
-                print(f"Error creating BorrowingWithBookInfo: {e}")
-                print(f"Data: {borrowing_dict}")
-
-        return results
-
-    def get_book_borrowing_history(self, db: Session, book_id: int) -> List[BorrowingWithBookInfo]:
-        self.__book_service.get_book(db, book_id)
+        return self._validate_borrowing_rows(overdue_borrowings)
 
-        # Define subquery to get author names as a string for each book
-        author_subquery = db.query(
-            BookAuthor.book_id,
-            func.string_agg(Author.name, ', ').label('author_names')
-        ).join(
-            Author, BookAuthor.author_id == Author.author_id
-        ).group_by(
-            BookAuthor.book_id
-        ).subquery()
+    def get_book_borrowing_history(self, db: Session, book_id: int, borrowed_after: Optional[datetime] = None,
+                                   include_archive: bool = False) -> List[BorrowingWithBookInfo]:
+        self.__book_service.get_book(db, book_id)
 
-        borrowings = db.query(
-            Borrowing,
-            Book.title.label("book_title"),
-            author_subquery.c.author_names.label("book_authors"),
-            Book.isbn.label("book_isbn")
-        ).join(
-            Book, Borrowing.book_id == Book.book_id
-        ).outerjoin(
-            author_subquery, Book.book_id == author_subquery.c.book_id
-        ).filter(
+        query = self._borrowing_with_book_info_query(db).filter(
             Borrowing.book_id == book_id
-        ).order_by(
+        )
+        # a borrow_date bound lets Postgres prune the older monthly partitions
+        if borrowed_after:
+            query = query.filter(Borrowing.borrow_date >= borrowed_after)
+
+        borrowings = query.order_by(
             desc(Borrowing.borrow_date)
         ).all()
 
-        results = []
-        for b, title, authors, isbn in borrowings:
-            borrowing_dict = {
-                **b.__dict__,
-                "book_title": title,
-                "book_authors": authors or "",
-                "book_isbn": isbn
-            }
-            results.append(BorrowingWithBookInfo(**borrowing_dict))
+        if include_archive:
+            archive_query = self._borrowing_with_book_info_query(db, BorrowingArchive).filter(
+                BorrowingArchive.book_id == book_id
+            )
+            if borrowed_after:
+                archive_query = archive_query.filter(BorrowingArchive.borrow_date >= borrowed_after)
+            borrowings = sorted(borrowings + archive_query.all(), key=lambda row: row.borrow_date, reverse=True)
 
-        return results
+        return self._validate_borrowing_rows(borrowings)
 
     def list_borrowings(
             self,
@@ -422,31 +700,14 @@ class BorrowingService:
             book_id: Optional[int] = None,
             status: Optional[str] = None,
             overdue_only: bool = False,
+            borrowed_after: Optional[datetime] = None,
             sort_by: str = "borrow_date",
             sort_order: str = "desc",
             page: int = 1,
             items_per_page: int = 10
     ) -> PaginatedResponse:
 
-        author_subquery = db.query(
-            BookAuthor.book_id,
-            func.string_agg(Author.name, ', ').label('author_names')
-        ).join(
-            Author, BookAuthor.author_id == Author.author_id
-        ).group_by(
-            BookAuthor.book_id
-        ).subquery()
-
-        query = db.query(
-            Borrowing,
-            Book.title.label("book_title"),
-            author_subquery.c.author_names.label("book_authors"),
-            Book.isbn.label("book_isbn")
-        ).join(
-            Book, Borrowing.book_id == Book.book_id
-        ).outerjoin(
-            author_subquery, Book.book_id == author_subquery.c.book_id
-        )
+        query = self._borrowing_with_book_info_query(db)
 
         filters = []
 
@@ -462,6 +723,9 @@ class BorrowingService:
         if overdue_only:
             filters.append(Borrowing.status == BorrowingStatus.OVERDUE.value)
 
+        if borrowed_after:
+            filters.append(Borrowing.borrow_date >= borrowed_after)
+
         if filters:
             query = query.filter(and_(*filters))
 
@@ -486,20 +750,11 @@ class BorrowingService:
 
         query = query.offset(skip).limit(limit)
         results = query.all()
-        data = []
-        for b, title, authors, isbn in results:
-            borrowing_dict = {
-                **b.__dict__,
-                "book_title": title,
-                "book_authors": authors or "",
-                "book_isbn": isbn
-            }
-            data.append(BorrowingWithBookInfo(**borrowing_dict))
 
         return PaginatedResponse(
-            data=data,
+            data=self._validate_borrowing_rows(results),
             total=total,
             skip=skip,
             limit=limit,
             has_more=has_more
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,192 @@
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.book import Book
+from app.models.books_queue import BookRequestQueue
+from app.services.book_service import BookService
+from app.services.notification_service import NotificationService
+from app.services.request_queue_mirror_service import RequestQueueMirrorService
+from app.utils.constants import RequestStatus
+
+logger = logging.getLogger(__name__)
+
+
+class ReservedHold(NamedTuple):
+    request_id: int
+    book_id: int
+    user_id: int
+
+
+class HoldAllocationService:
+    """
+        Reserves returned copies for patrons waiting in the request queue.
+
+        A reserved copy is taken out of available_copies so nobody else can borrow it,
+        and it stays with the patron until they borrow it or the hold expires. A background
+        thread expires unclaimed holds every HOLD_EXPIRY_CHECK_SECONDS and passes their copies on.
+    """
+
+    def __init__(self, notification_service: Optional[NotificationService] = None,
+                 queue_mirror: Optional[RequestQueueMirrorService] = None,
+                 book_service: Optional[BookService] = None):
+        self.__notification_service = notification_service or NotificationService()
+        self.__queue_mirror = queue_mirror or RequestQueueMirrorService()
+        self.__book_service = book_service or BookService()
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def allocate(self, db: Session, book_ids: List[int]) -> List[ReservedHold]:
+        """
+            Reserves the free copies of book_ids for the oldest pending requests, in one pass
+            over all the books: one locking read, one UPDATE of the queue and one of the books.
+        """
+        now = datetime.utcnow()
+        hold_expires_at = now + timedelta(hours=settings.HOLD_EXPIRY_HOURS)
+
+        # locked in book_id order, so concurrent allocations over overlapping books cannot deadlock
+        available_per_book = dict(db.query(Book.book_id, Book.available_copies).filter(
+            Book.book_id.in_(sorted(set(book_ids))),
+            Book.available_copies > 0
+        ).order_by(Book.book_id).with_for_update().all())
+        if not available_per_book:
+            db.commit()
+            return []
+
+        ranked = select(
+            BookRequestQueue.request_id,
+            func.row_number().over(
+                partition_by=BookRequestQueue.book_id, order_by=BookRequestQueue.request_date
+            ).label("position")
+        ).where(
+            BookRequestQueue.book_id.in_(list(available_per_book)),
+            BookRequestQueue.status == RequestStatus.PENDING.value
+        ).subquery()
+        first_in_line = select(ranked.c.request_id).join(
+            BookRequestQueue, BookRequestQueue.request_id == ranked.c.request_id
+        ).where(
+            ranked.c.position <= case(available_per_book, value=BookRequestQueue.book_id, else_=0)
+        )
+
+        reserved = [ReservedHold(*row) for row in db.execute(
+            update(BookRequestQueue).where(
+                BookRequestQueue.request_id.in_(first_in_line)
+            ).values(
+                status=RequestStatus.RESERVED.value,
+                reserved_at=now,
+                hold_expires_at=hold_expires_at,
+                notification_sent=True
+            ).returning(
+                BookRequestQueue.request_id, BookRequestQueue.book_id, BookRequestQueue.user_id
+            ).execution_options(synchronize_session=False)
+        )]
+
+        reserved_per_book = Counter(hold.book_id for hold in reserved)
+        if reserved_per_book:
+            db.query(Book).filter(
+                Book.book_id.in_(list(reserved_per_book))
+            ).update(
+                {Book.available_copies: Book.available_copies - case(reserved_per_book, value=Book.book_id, else_=0)},
+                synchronize_session=False
+            )
+        db.commit()
+
+        if not reserved:
+            return reserved
+
+        # the holds are committed by now, so a Redis failure must not fail the return that freed the copy
+        try:
+            self.__book_service.invalidate_book_cache(*reserved_per_book)
+            self.__queue_mirror.remove((hold.book_id, hold.user_id) for hold in reserved)
+        except Exception as e:
+            logger.error(f"Cache update error after reserving holds: {str(e)}")
+
+        for hold in reserved:
+            try:
+                self.__notification_service.notify_book_available(
+                    user_id=hold.user_id,
+                    book_id=hold.book_id,
+                    request_id=hold.request_id,
+                    hold_expires_at=hold_expires_at
+                )
+            except Exception as e:
+                logger.error(f"Hold notification error for request {hold.request_id}: {str(e)}")
+
+        return reserved
+
+    def get_active_holds(self, db: Session, user_id: int, book_ids: List[int]) -> Dict[int, BookRequestQueue]:
+        holds = db.query(BookRequestQueue).filter(
+            BookRequestQueue.user_id == user_id,
+            BookRequestQueue.book_id.in_(book_ids),
+            BookRequestQueue.status == RequestStatus.RESERVED.value,
+            BookRequestQueue.hold_expires_at >= datetime.utcnow()
+        ).with_for_update().all()
+        return {hold.book_id: hold for hold in holds}
+
+    def expire_holds(self, db: Session) -> int:
+        """
+            Expires every reserved hold past its deadline, puts the copies back in one
+            UPDATE, and hands them to the next patrons in line.
+        """
+        expired = db.query(BookRequestQueue).filter(
+            BookRequestQueue.status == RequestStatus.RESERVED.value,
+            BookRequestQueue.hold_expires_at < datetime.utcnow()
+        ).with_for_update(skip_locked=True).all()
+
+        if not expired:
+            return 0
+
+        for request in expired:
+            request.status = RequestStatus.EXPIRED.value
+
+        released_per_book = Counter(request.book_id for request in expired)
+        db.query(Book).filter(
+            Book.book_id.in_(list(released_per_book))
+        ).update(
+            {Book.available_copies: func.least(
+                Book.total_copies,
+                Book.available_copies + case(released_per_book, value=Book.book_id, else_=0)
+            )},
+            synchronize_session=False
+        )
+        db.commit()
+        try:
+            self.__book_service.invalidate_book_cache(*released_per_book)
+        except Exception as e:
+            logger.error(f"Book cache invalidation error after expiring holds: {str(e)}")
+
+        self.allocate(db, list(released_per_book))
+        return len(expired)
+
+    def start(self) -> None:
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self._run, name="hold-expiry", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        if self.__thread and self.__thread.is_alive():
+            self.__thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self.__stop_event.wait(settings.HOLD_EXPIRY_CHECK_SECONDS):
+            db = SessionLocal()
+            try:
+                expired = self.expire_holds(db)
+                if expired:
+                    logger.info(f"Expired {expired} unclaimed holds")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Could not expire holds: {str(e)}")
+            finally:
+                db.close()
+
+
+hold_allocations = HoldAllocationService()
@@ -0,0 +1,158 @@
+import logging
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.redis_cache_service import RedisCacheService
+from app.models import Borrowing
+from app.utils.constants import (
+    BorrowingStatus, LOAN_COUNTERS_TTL,
+    ADMIN_ACCESS_LEVEL, LIBRARIAN_ACCESS_LEVEL, USER_ACCESS_LEVEL
+)
+
+logger = logging.getLogger(__name__)
+
+# only moves counters that are already seeded, so a partial hash never looks like real state;
+# the version bump tells a seed in flight that its count is already stale
+_APPLY_DELTAS_SCRIPT = """
+for i = 1, #KEYS, 2 do
+    redis.call('INCR', KEYS[i + 1])
+    redis.call('EXPIRE', KEYS[i + 1], ARGV[#ARGV])
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('HINCRBY', KEYS[i], 'overdue', ARGV[(i + 1) / 2])
+    end
+end
+return 1
+"""
+
+# stores a seeded count only if no delta was applied since the seed read the version
+_SEED_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'overdue', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+LoanCounters = Dict[str, int]
+LoanRule = Callable[[LoanCounters, int], Tuple[Optional[int], str]]
+
+
+def max_active_loans_rule(counters: LoanCounters, access_level: int) -> Tuple[Optional[int], str]:
+    limit = {
+        ADMIN_ACCESS_LEVEL: settings.MAX_ACTIVE_LOANS_ADMIN,
+        LIBRARIAN_ACCESS_LEVEL: settings.MAX_ACTIVE_LOANS_LIBRARIAN,
+        USER_ACCESS_LEVEL: settings.MAX_ACTIVE_LOANS_USER,
+    }.get(access_level, settings.MAX_ACTIVE_LOANS_USER)
+    return limit - counters["active"], f"Active loan limit of {limit} reached"
+
+
+def max_overdue_loans_rule(counters: LoanCounters, access_level: int) -> Tuple[Optional[int], str]:
+    limit = settings.MAX_OVERDUE_LOANS
+    if counters["overdue"] > limit:
+        return 0, f"Borrowing is blocked while more than {limit} loans are overdue"
+    return None, ""
+
+
+class LoanPolicyService:
+    """
+        Evaluates loan-limit rules for a user about to borrow.
+
+        The active loan count comes from users.active_loans, read under the row lock the borrow
+        transaction already holds, so concurrent borrows cannot both slip under the limit. The
+        overdue count is cached in the Redis hash loan_counters:{user_id}, seeded from Postgres
+        the first time a user is seen (or after it expires) and moved with the deltas of every
+        committed Borrowing change. If Redis is down the overdue rule fails open.
+    """
+
+    KEY_PREFIX = "loan_counters:"
+    VERSION_KEY_PREFIX = "loan_counters_version:"
+    RULES: List[LoanRule] = [max_active_loans_rule, max_overdue_loans_rule]
+
+    def __init__(self):
+        self.redis_client = RedisCacheService().redis_client
+        self.__apply_deltas = self.redis_client.register_script(_APPLY_DELTAS_SCRIPT)
+        self.__seed = self.redis_client.register_script(_SEED_SCRIPT)
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.KEY_PREFIX}{user_id}"
+
+    def _version_key(self, user_id: int) -> str:
+        return f"{self.VERSION_KEY_PREFIX}{user_id}"
+
+    def get_overdue(self, db: Session, user_id: int) -> int:
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hget(self._key(user_id), "overdue")
+            pipe.get(self._version_key(user_id))
+            overdue, version = pipe.execute()
+        except Exception as e:
+            logger.error(f"Loan counter read error: {str(e)}")
+            return 0
+        if overdue is not None:
+            return int(overdue)
+        return self._seed(db, user_id, version)
+
+    def _seed(self, db: Session, user_id: int, version: Optional[str]) -> int:
+        overdue = db.query(func.count()).select_from(Borrowing).filter(
+            Borrowing.user_id == user_id,
+            Borrowing.status == BorrowingStatus.OVERDUE.value
+        ).scalar()
+        try:
+            self.__seed(keys=[self._key(user_id), self._version_key(user_id)],
+                        args=[version or "", overdue, LOAN_COUNTERS_TTL])
+        except Exception as e:
+            logger.error(f"Loan counter seed error: {str(e)}")
+        return overdue
+
+    def allowance(self, db: Session, user_id: int, access_level: int, active_loans: int) -> Tuple[int, str]:
+        """
+            Returns how many more loans the user may take right now and, when that is
+            limited by a rule, the reason reported by the most restrictive one. active_loans
+            must be read in the borrowing transaction with the user's row locked.
+        """
+        counters = {"active": active_loans, "overdue": self.get_overdue(db, user_id)}
+        allowed, reason = None, ""
+        for rule in self.RULES:
+            rule_allowed, rule_reason = rule(counters, access_level)
+            if rule_allowed is not None and (allowed is None or rule_allowed < allowed):
+                allowed, reason = rule_allowed, rule_reason
+        if allowed is None:
+            return sys.maxsize, ""
+        return max(allowed, 0), reason
+
+    def enforce(self, db: Session, user_id: int, access_level: int, active_loans: int) -> None:
+        allowed, reason = self.allowance(db, user_id, access_level, active_loans)
+        if allowed < 1:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=reason
+            )
+
+    def apply(self, overdue: Optional[Dict[int, int]] = None) -> None:
+        """
+            Moves the cached overdue counters by the deltas of a committed transaction. If
+            Redis cannot be updated the counters are dropped, so the next check reseeds them.
+        """
+        overdue = {user_id: delta for user_id, delta in (overdue or {}).items() if delta}
+        if not overdue:
+            return
+
+        keys, args = [], []
+        for user_id in sorted(overdue):
+            keys.extend([self._key(user_id), self._version_key(user_id)])
+            args.append(overdue[user_id])
+        args.append(LOAN_COUNTERS_TTL)
+        try:
+            self.__apply_deltas(keys=keys, args=args)
+        except Exception as e:
+            logger.error(f"Loan counter update error: {str(e)}")
+            try:
+                self.redis_client.delete(*keys[::2])
+            except Exception:
+                pass
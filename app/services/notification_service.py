@@ -1,6 +1,7 @@
 import asyncio
 import json
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 
 from app.core.redis_cache_service import RedisCacheService
@@ -44,7 +45,8 @@ class NotificationService:
         self.connection_manager = ConnectionManager()
         self.redis_client = self.redis_service.redis_client
 
-    def notify_book_available(self, user_id: int, book_id: int, request_id: int) -> None:
+    def notify_book_available(self, user_id: int, book_id: int, request_id: int,
+                              hold_expires_at: Optional[datetime] = None) -> None:
         book_details = self._get_book_details(book_id)
         notification = {
             "type": "BOOK_AVAILABLE",
@@ -54,6 +56,10 @@ class NotificationService:
             "book_title": book_details.get("title", "Unknown"),
             "message": f"The book '{book_details.get('title', 'Unknown')}' is now available for borrowing.",
         }
+        if hold_expires_at is not None:
+            notification["hold_expires_at"] = hold_expires_at.isoformat()
+            notification["message"] = (f"The book '{book_details.get('title', 'Unknown')}' is reserved for you "
+                                       f"until {hold_expires_at.strftime('%Y-%m-%d %H:%M')} UTC.")
 
         user_channel = f"user:{user_id}:notifications"
         self.redis_client.publish(user_channel, json.dumps(notification))
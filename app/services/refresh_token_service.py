@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import time
+from secrets import token_hex, token_urlsafe
+from typing import Any, Dict
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.redis_cache_service import RedisCacheService
+from app.models.user import User
+from app.security.token_revocation import token_revocations
+from app.utils.common_utils import create_access_token
+
+logger = logging.getLogger(__name__)
+
+# swaps the family's current token only if the presented one is still current;
+# a live family with another current token means reuse and is ended (-1)
+_ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[2])
+if current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[5], 'KEEPTTL')
+    redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[4])
+    return 1
+end
+if current then
+    redis.call('DEL', KEYS[2])
+    return -1
+end
+return 0
+"""
+
+
+class RefreshTokenService:
+    """
+        Opaque refresh tokens kept in Redis under their SHA-256, so a refresh costs a GET, one
+        script call, a primary key lookup of the user and a JWT signature: no bcrypt.
+
+        The tokens handed out from one login form a family. Every refresh consumes the presented
+        token and returns the next one, and the family ends REFRESH_TOKEN_EXPIRE_DAYS after the
+        login however often it is refreshed. A consumed token presented again means it leaked,
+        so the whole family is ended and the user's access tokens are revoked.
+
+        Each user's families are listed in refresh_families:{user_id}. A family replays the
+        claims of its login, so revoke_user() ends them all whenever those claims or the
+        credentials behind them change: deactivation, API key reset, password or role change.
+    """
+
+    TOKEN_KEY_PREFIX = "refresh_token:"
+    FAMILY_KEY_PREFIX = "refresh_family:"
+    USER_FAMILIES_KEY_PREFIX = "refresh_families:"
+
+    def __init__(self):
+        self.redis_client = RedisCacheService().redis_client
+        self.lifetime_seconds = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        self.__rotate = self.redis_client.register_script(_ROTATE_SCRIPT)
+
+    @staticmethod
+    def _digest(refresh_token: str) -> str:
+        # refresh tokens are 256 random bits, so a fast hash is enough to keep them out of Redis
+        return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+    def issue(self, user_id: int, claims: Dict[str, Any]) -> str:
+        """Starts a new family for a login and returns its first refresh token."""
+        logged_in_at = time.time()
+        record = {
+            "user_id": user_id,
+            "family": token_hex(16),
+            "logged_in_at": logged_in_at,
+            "expires_at": logged_in_at + self.lifetime_seconds,
+            "claims": claims,
+        }
+        refresh_token = token_urlsafe(32)
+        digest = self._digest(refresh_token)
+
+        pipeline = self.redis_client.pipeline()
+        pipeline.set(self.TOKEN_KEY_PREFIX + digest, json.dumps(record), ex=self.lifetime_seconds)
+        pipeline.set(self.FAMILY_KEY_PREFIX + record["family"], digest, ex=self.lifetime_seconds)
+        pipeline.sadd(self.USER_FAMILIES_KEY_PREFIX + str(user_id), record["family"])
+        pipeline.expire(self.USER_FAMILIES_KEY_PREFIX + str(user_id), self.lifetime_seconds)
+        pipeline.execute()
+        return refresh_token
+
+    def revoke_user(self, user_id: int) -> None:
+        """Ends every refresh token family of user_id, so each of their sessions has to log in again."""
+        user_families_key = self.USER_FAMILIES_KEY_PREFIX + str(user_id)
+        try:
+            families = self.redis_client.smembers(user_families_key)
+            pipeline = self.redis_client.pipeline()
+            for family in families:
+                pipeline.delete(self.FAMILY_KEY_PREFIX + family)
+            pipeline.delete(user_families_key)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f"Refresh token revocation error for user {user_id}: {str(e)}")
+
+    def refresh(self, db: Session, refresh_token: str) -> Dict[str, str]:
+        digest = self._digest(refresh_token)
+        value = self.redis_client.get(self.TOKEN_KEY_PREFIX + digest)
+        if value is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        record = json.loads(value)
+        family_key = self.FAMILY_KEY_PREFIX + record["family"]
+
+        if record.get("consumed"):
+            if self.redis_client.delete(family_key):
+                self._revoke_after_reuse(record["user_id"])
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+        ttl = int(record["expires_at"] - time.time())
+        if ttl <= 0 or token_revocations.is_revoked(record["user_id"], record["logged_in_at"]):
+            self.redis_client.delete(family_key)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail="Refresh token has expired, Please login again")
+
+        user = db.query(User).filter(User.user_id == record["user_id"]).first()
+        if user is None or not user.is_active:
+            self.redis_client.delete(family_key)
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is deactivated")
+
+        next_token = token_urlsafe(32)
+        next_digest = self._digest(next_token)
+        consumed = json.dumps({"user_id": record["user_id"], "family": record["family"], "consumed": True})
+        rotated = self.__rotate(
+            keys=[self.TOKEN_KEY_PREFIX + digest, family_key, self.TOKEN_KEY_PREFIX + next_digest],
+            args=[digest, next_digest, value, ttl, consumed]
+        )
+        if rotated != 1:
+            if rotated == -1:
+                self._revoke_after_reuse(record["user_id"])
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+        access_token, expires_in = create_access_token(record["claims"])
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": expires_in.__str__(),
+            "refresh_token": next_token,
+        }
+
+    @staticmethod
+    def _revoke_after_reuse(user_id: int) -> None:
+        logger.warning(f"Refresh token reuse for user {user_id}, revoking their tokens")
+        token_revocations.revoke_user(user_id)
@@ -0,0 +1,88 @@
+import math
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.redis_cache_service import RedisCacheService
+from app.models.books_queue import BookRequestQueue
+from app.utils.constants import RequestStatus, LOAN_PERIOD_DAYS
+
+
+class RequestQueueMirrorService:
+    """
+        Mirrors the PENDING part of book_request_queue into one Redis sorted set per book,
+        scored by request date, so queue position is a ZRANK instead of a Postgres query.
+        Postgres stays the source of truth; reconcile() rebuilds the sets from it.
+    """
+
+    KEY_PREFIX = "book_queue:"
+
+    def __init__(self):
+        self.redis_client = RedisCacheService().redis_client
+
+    def _key(self, book_id: int) -> str:
+        return f"{self.KEY_PREFIX}{book_id}"
+
+    @staticmethod
+    def _score(request_date: datetime) -> float:
+        # request dates are stored as naive UTC; a naive timestamp() would read them as local time
+        if request_date.tzinfo is None:
+            request_date = request_date.replace(tzinfo=timezone.utc)
+        return request_date.timestamp()
+
+    def add(self, book_id: int, user_id: int, request_date: datetime) -> None:
+        self.redis_client.zadd(self._key(book_id), {str(user_id): self._score(request_date)}, nx=True)
+
+    def remove(self, entries: Iterable[Tuple[int, int]]) -> None:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for book_id, user_id in entries:
+            pipe.zrem(self._key(book_id), str(user_id))
+        pipe.execute()
+
+    def position(self, book_id: int, user_id: int) -> Optional[Tuple[int, int]]:
+        """(1-based position, queue length) of user_id in the book's queue, or None if not queued."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zrank(self._key(book_id), str(user_id))
+        pipe.zcard(self._key(book_id))
+        rank, queue_length = pipe.execute()
+
+        if rank is None:
+            return None
+        return rank + 1, queue_length
+
+    @staticmethod
+    def estimated_wait_days(position: int, total_copies: int) -> int:
+        return math.ceil(position / max(total_copies, 1)) * LOAN_PERIOD_DAYS
+
+    def reconcile(self, db: Session) -> int:
+        """
+            Rebuilds every per-book set from the PENDING rows in Postgres and drops sets
+            for books that no longer have anyone waiting. Returns the number of books mirrored.
+        """
+        pending = db.query(
+            BookRequestQueue.book_id,
+            BookRequestQueue.user_id,
+            BookRequestQueue.request_date
+        ).filter(
+            BookRequestQueue.status == RequestStatus.PENDING.value
+        ).all()
+
+        queues: Dict[int, Dict[str, float]] = {}
+        for book_id, user_id, request_date in pending:
+            queues.setdefault(book_id, {})[str(user_id)] = self._score(request_date)
+
+        stale_keys: List[str] = [
+            key for key in self.redis_client.scan_iter(match=f"{self.KEY_PREFIX}*")
+            if int(key[len(self.KEY_PREFIX):]) not in queues
+        ]
+
+        pipe = self.redis_client.pipeline(transaction=True)
+        for key in stale_keys:
+            pipe.delete(key)
+        for book_id, members in queues.items():
+            pipe.delete(self._key(book_id))
+            pipe.zadd(self._key(book_id), members)
+        pipe.execute()
+
+        return len(queues)
@@ -2,32 +2,34 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.models import User
 from app.models.api_key import UserApiKey
+from app.security.token_revocation import token_revocations
+from app.services.refresh_token_service import RefreshTokenService
 
 
 class UserApiKeyService:
 
     def create_api_key_mapping(self, user:User, db:Session)->str:
+       """Attaches a new key to user; it is inserted and committed together with the user."""
        raw_api_key=UserApiKey.generate_api_key()
        hashed_key=UserApiKey.hash_key(api_key=raw_api_key)
 
        expires_at = datetime.utcnow() + timedelta(days=90)
-       api_key=UserApiKey(
-           user_id=user.user_id,
+       user.user_keys.append(UserApiKey(
+           key_id=UserApiKey.parse_key_id(raw_api_key),
            key_hash=hashed_key,
            expires_at=expires_at
-       )
-       db.add(api_key)
-       db.commit()
-       db.refresh(api_key)
+       ))
 
        return raw_api_key
 
-    def validate_api_key(self, api_key: str, db:Session, user_id:int) ->tuple[bool, str, UserApiKey|None]:
+    async def validate_api_key(self, api_key: str, db:Session, user_id:int) ->tuple[bool, str, UserApiKey|None]:
         now = datetime.utcnow()
+        key_id = UserApiKey.parse_key_id(api_key)
+        # current keys are found by their id; keys issued before the lk1 format only by user
         active_key = db.query(UserApiKey).filter(
             UserApiKey.user_id == user_id,
             UserApiKey.is_active == True,
-
+            UserApiKey.key_id == key_id if key_id else UserApiKey.key_id.is_(None)
         ).first()
         if active_key is None:
             return False, "Api key not found",None
@@ -35,11 +37,15 @@ class UserApiKeyService:
         if active_key.expires_at < now:
             return False, "Api key has been expired, Please generate a new one",None
 
-        verify_key=UserApiKey.verify_key(api_key, active_key.key_hash)
+        verify_key=await UserApiKey.verify_key_async(api_key, active_key.key_hash)
 
         if not verify_key:
             return False, "Invalid credentials, Please put correct api key",None
 
+        if UserApiKey.is_legacy_hash(active_key.key_hash):
+            active_key.key_hash = UserApiKey.hash_key(api_key)
+            db.commit()
+
         return True, "Credentials verified",active_key
 
 
@@ -58,6 +64,7 @@ class UserApiKeyService:
 
         if existing_key:
             # Update existing key
+            existing_key.key_id = UserApiKey.parse_key_id(raw_api_key)
             existing_key.key_hash = hashed_key
             existing_key.expires_at = expires_at
             existing_key.is_active = True
@@ -66,11 +73,16 @@ class UserApiKeyService:
             # Create new key if none exists
             api_key = UserApiKey(
                 user_id=user.user_id,
+                key_id=UserApiKey.parse_key_id(raw_api_key),
                 key_hash=hashed_key,
                 expires_at=expires_at
             )
             db.add(api_key)
 
+        user_id = user.user_id
         db.commit()
+        # tokens issued for the old key must not outlive it
+        token_revocations.revoke_user(user_id)
+        RefreshTokenService().revoke_user(user_id)
 
         return raw_api_key
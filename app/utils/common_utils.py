@@ -1,8 +1,12 @@
+import time
 from datetime import datetime, timedelta
+from typing import Any, Optional
 
-import jwt
+from fastapi import Response
+from pydantic import TypeAdapter
 
 from app.config import settings
+from app.security.jwt_keys import jwt_key_ring
 
 
 
@@ -10,7 +14,21 @@ from app.config import settings
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # float iat, so a token issued right after a revocation in the same second stays valid
+    to_encode.update({"exp": expire, "iat": time.time()})
 
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt_key_ring.encode(to_encode)
     return encoded_jwt, expire
+
+
+def json_response(body: bytes | str, status_code: int = 200) -> Response:
+    """
+        Wraps an already serialized JSON payload. FastAPI returns Response objects as they are,
+        so validated models and cache hits skip response_model re-validation and re-encoding.
+    """
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def model_json_response(content: Any, adapter: Optional[TypeAdapter] = None, status_code: int = 200) -> Response:
+    body = adapter.dump_json(content) if adapter is not None else content.model_dump_json()
+    return json_response(body, status_code=status_code)
@@ -4,6 +4,9 @@ API_KEY_HEADER="X-API-Key"
 ADMIN_ACCESS_LEVEL=3
 LIBRARIAN_ACCESS_LEVEL=2
 USER_ACCESS_LEVEL=1
+LOAN_PERIOD_DAYS=14
+USER_BORROWINGS_CACHE_TTL=900
+LOAN_COUNTERS_TTL=86400
 
 
 
@@ -16,9 +19,14 @@ class BorrowingStatus(str, enum.Enum):
     DAMAGED = "damaged"
 
 
+ACTIVE_BORROWING_STATUSES = (BorrowingStatus.BORROWED.value, BorrowingStatus.OVERDUE.value)
+
+
 class RequestStatus(str, enum.Enum):
     PENDING = "PENDING"
+    RESERVED = "RESERVED"
     FULFILLED = "FULFILLED"
+    EXPIRED = "EXPIRED"
     CANCELLED = "CANCELLED"
 
     def __str__(self):
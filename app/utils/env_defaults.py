@@ -0,0 +1,18 @@
+"""
+    Placeholder settings for running code outside a deployment, i.e. the test suite and the
+    benchmarks. Settings are read when app.config is first imported, so set_env_defaults has to
+    run before any other app import; values already in the environment are kept.
+"""
+import os
+
+ENV_DEFAULTS = {
+    "SECRET_KEY": "local-secret-key-of-at-least-32-bytes", "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30", "ADMIN_INITIAL_PASSWORD": "local", "ADMIN_EMAIL": "local@example.com",
+    "ADMIN_USERNAME": "local", "REDIS_HOST": "localhost", "REDIS_PORT": "6379",
+    "POSTGRES_USER": "local", "POSTGRES_PASSWORD": "local", "POSTGRES_DB": "local",
+}
+
+
+def set_env_defaults(database_url: str) -> None:
+    for name, value in {"DATABASE_URL": database_url, **ENV_DEFAULTS}.items():
+        os.environ.setdefault(name, value)
@@ -0,0 +1,98 @@
+"""
+    Serialization cost of borrowing list builders per 1k rows.
+
+    "before" is the old path: ORM Borrowing entities spread through __dict__ into one
+    BorrowingWithBookInfo(**...) call per row. "after" selects plain columns and validates
+    the whole result set with one TypeAdapter call.
+
+    "fetch+build" includes running the query and hydrating rows, "build" is only the
+    conversion into response models.
+
+    Runs against an in-memory SQLite database so it needs no Postgres or Redis:
+        python -m benchmarks.borrowing_serialization
+"""
+import time
+from datetime import datetime, timedelta
+
+from app.utils.env_defaults import set_env_defaults
+
+set_env_defaults("sqlite://")
+
+from sqlalchemy import create_engine, literal
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Borrowing, Book, User
+from app.schemas.borrowing import BorrowingWithBookInfo, borrowing_with_book_info_list
+
+ROWS = 1000
+ROUNDS = 20
+
+
+def seed(db):
+    now = datetime.utcnow()
+    db.add(User(user_id=1, username="bench", email="bench@example.com", password="x",
+                first_name="Bench", last_name="User"))
+    db.add(Book(book_id=1, isbn="9780000000001", title="Benchmark Book", total_copies=ROWS, available_copies=0))
+    db.add_all(Borrowing(borrowing_id=i + 1, user_id=1, book_id=1, borrow_date=now,
+                         due_date=now + timedelta(days=14), status="borrowed") for i in range(ROWS))
+    db.commit()
+
+
+def before(db):
+    rows = db.query(
+        Borrowing, Book.title, literal("Author One, Author Two"), Book.isbn
+    ).join(Book, Borrowing.book_id == Book.book_id).all()
+    fetched = time.perf_counter()
+    data = []
+    for b, title, authors, isbn in rows:
+        data.append(BorrowingWithBookInfo(**{
+            **b.__dict__,
+            "book_title": title,
+            "book_authors": authors or "",
+            "book_isbn": isbn
+        }))
+    return fetched
+
+
+def after(db):
+    rows = db.query(
+        Borrowing.borrowing_id, Borrowing.user_id, Borrowing.book_id, Borrowing.borrow_date,
+        Borrowing.due_date, Borrowing.return_date, Borrowing.status,
+        Book.title.label("book_title"), literal("Author One, Author Two").label("book_authors"),
+        Book.isbn.label("book_isbn")
+    ).join(Book, Borrowing.book_id == Book.book_id).all()
+    fetched = time.perf_counter()
+    borrowing_with_book_info_list.validate_python([row._asdict() for row in rows])
+    return fetched
+
+
+def measure(session_factory, builder):
+    total, serialization = 0.0, 0.0
+    for _ in range(ROUNDS):
+        db = session_factory()
+        start = time.perf_counter()
+        fetched = builder(db)
+        end = time.perf_counter()
+        db.close()
+        total += end - start
+        serialization += end - fetched
+    return total / ROUNDS * 1000, serialization / ROUNDS * 1000
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    seed(db)
+    db.close()
+
+    print(f"{'path':<8}{'fetch+build ms':>16}{'build ms':>12}   per {ROWS} rows, mean of {ROUNDS}")
+    for label, builder in (("before", before), ("after", after)):
+        total, serialization = measure(session_factory, builder)
+        print(f"{label:<8}{total:>16.2f}{serialization:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
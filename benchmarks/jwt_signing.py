@@ -0,0 +1,53 @@
+"""
+    Access token signs and verifies per second for each supported algorithm on this host.
+
+    Tokens carry the same claims create_token_data puts in a real one and go through
+    JwtKeyRing, so the asymmetric rows include the kid lookup. Verify is what every
+    protected request pays on a token cache miss, on every worker and websocket node:
+        python -m benchmarks.jwt_signing
+"""
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.utils.env_defaults import set_env_defaults
+
+set_env_defaults("sqlite://")
+
+from app.config import settings
+from app.security.jwt_keys import JwtKeyRing, EDDSA, ES256
+
+DURATION_SECONDS = 1.0
+ALGORITHMS = ["HS256", ES256, EDDSA]
+
+CLAIMS = {
+    "first_name": "Bench", "last_name": "User", "username": "bench_user", "user_id": 42,
+    "email": "bench_user@example.com", "role": 1, "key_hash": "hmac-sha256$" + "0" * 64,
+    "key_expires_at": "2030-01-01T00:00:00",
+}
+
+
+def rate(operation) -> float:
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < DURATION_SECONDS:
+        operation()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    claims = dict(CLAIMS, exp=datetime.utcnow() + timedelta(hours=1))
+    print(f"{'algorithm':<12}{'sign/s':>10}{'verify/s':>10}{'us/verify':>11}{'token bytes':>13}")
+    for algorithm in ALGORITHMS:
+        with tempfile.TemporaryDirectory() as keys_dir:
+            key_ring = JwtKeyRing(algorithm, keys_dir, settings.SECRET_KEY, timedelta(minutes=30),
+                                  generate_signing_key=True)
+            key_ring.ensure_signing_key()
+            token = key_ring.encode(claims)
+            sign_rate = rate(lambda: key_ring.encode(claims))
+            verify_rate = rate(lambda: key_ring.decode(token))
+        print(f"{algorithm:<12}{sign_rate:>10.0f}{verify_rate:>10.0f}{1e6 / verify_rate:>11.1f}{len(token):>13}")
+
+
+if __name__ == "__main__":
+    main()
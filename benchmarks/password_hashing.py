@@ -0,0 +1,56 @@
+"""
+    Hashes per second for each password hashing setting on this host.
+
+    Each setting hashes and verifies for about a second on one thread, which is what a
+    single hashing-executor worker can sustain; multiply by HASHING_MAX_WORKERS for the
+    process. Pick the strongest setting whose verify rate covers the expected login peak.
+
+    argon2id rows are skipped when argon2-cffi is not installed:
+        python -m benchmarks.password_hashing
+"""
+import time
+
+from app.utils.env_defaults import set_env_defaults
+
+set_env_defaults("sqlite://")
+
+from app.core.password_hasher import PasswordHasher, Argon2Hasher, BCRYPT, ARGON2ID
+
+SECRET = "Correct-Horse-Battery-9"
+DURATION_SECONDS = 1.0
+
+SETTINGS = [
+    ("bcrypt rounds=10", dict(algorithm=BCRYPT, bcrypt_rounds=10)),
+    ("bcrypt rounds=11", dict(algorithm=BCRYPT, bcrypt_rounds=11)),
+    ("bcrypt rounds=12", dict(algorithm=BCRYPT, bcrypt_rounds=12)),
+    ("bcrypt rounds=13", dict(algorithm=BCRYPT, bcrypt_rounds=13)),
+    ("argon2id t=2 m=19MiB p=1", dict(algorithm=ARGON2ID, argon2_time_cost=2, argon2_memory_cost=19456,
+                                      argon2_parallelism=1)),
+    ("argon2id t=3 m=64MiB p=4", dict(algorithm=ARGON2ID, argon2_time_cost=3, argon2_memory_cost=65536,
+                                      argon2_parallelism=4)),
+]
+
+
+def rate(operation) -> float:
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < DURATION_SECONDS:
+        operation()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{'setting':<28}{'hash/s':>10}{'verify/s':>10}{'ms/verify':>11}")
+    for label, options in SETTINGS:
+        if options["algorithm"] == ARGON2ID and Argon2Hasher is None:
+            print(f"{label:<28}{'skipped (argon2-cffi not installed)':>31}")
+            continue
+        hasher = PasswordHasher(**options)
+        hashed = hasher._hash(SECRET)
+        hash_rate = rate(lambda: hasher._hash(SECRET))
+        verify_rate = rate(lambda: hasher._verify(SECRET, hashed))
+        print(f"{label:<28}{hash_rate:>10.1f}{verify_rate:>10.1f}{1000 / verify_rate:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
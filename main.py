@@ -3,11 +3,18 @@ import uvicorn
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 import logging
 from app.core.create_super_admin import create_admin_user
-from app.database import Base, engine
+from app.database import Base, SessionLocal, engine
 from app.routes import router
+from app.routes.well_known import well_known_router
+from app.security.jwt_keys import jwt_key_ring
+from app.security.token_revocation import token_revocations
 from app.security.rate_limiter import GlobalRateLimitMiddleware, limiter
+from app.services.book_request_event_service import book_request_events
+from app.services.borrowing_partition_service import borrowing_partitions
+from app.services.hold_allocation_service import hold_allocations
 from app.socket_routes.websockets import ws_router
 from app.utils.custom_http_exceptions import custom_http_exception_handler, validation_exception_handler
 from slowapi import _rate_limit_exceeded_handler
@@ -20,8 +27,23 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     await create_admin_user()
+    jwt_key_ring.ensure_signing_key()
+    db = SessionLocal()
+    try:
+        borrowing_partitions.ensure_partitions(db)
+    except Exception as e:
+        logger.error(f"Could not create borrowings partitions: {str(e)}")
+    finally:
+        db.close()
+    book_request_events.start()
+    token_revocations.start()
+    borrowing_partitions.start()
+    hold_allocations.start()
     yield
-    pass
+    hold_allocations.stop()
+    borrowing_partitions.stop()
+    token_revocations.stop()
+    book_request_events.stop()
 
 Base.metadata.create_all(bind=engine)
 app = FastAPI(
@@ -31,7 +53,8 @@ app = FastAPI(
     license_info={
         "name": "All Right Reserved",
     },
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Register limiter with app
@@ -45,6 +68,7 @@ origins = [
 
 app.include_router(router, prefix="/api")
 app.include_router(ws_router)
+app.include_router(well_known_router)
 
 app.add_exception_handler(HTTPException, custom_http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -0,0 +1,42 @@
+"""borrowing_query_indexes
+
+Revision ID: 0a9e4c7b2d58
+Revises: f81d3a6c5e20
+Create Date: 2026-10-19 16:47:13.802264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.constants import ACTIVE_BORROWING_STATUSES
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9e4c7b2d58'
+down_revision: Union[str, None] = 'f81d3a6c5e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_borrowings_active_user_book', 'borrowings', ['user_id', 'book_id'], unique=False,
+                    postgresql_where=sa.column('status').in_(ACTIVE_BORROWING_STATUSES))
+    op.create_index('ix_borrowings_user_status_due', 'borrowings', ['user_id', 'status', 'due_date'], unique=False)
+    op.create_index('ix_borrowings_status_due', 'borrowings', ['status', 'due_date'], unique=False)
+
+    # both are leading prefixes of the composite indexes above
+    op.drop_index('ix_borrowings_user_id', table_name='borrowings')
+    op.drop_index('ix_borrowings_status', table_name='borrowings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_borrowings_status', 'borrowings', ['status'], unique=False)
+    op.create_index('ix_borrowings_user_id', 'borrowings', ['user_id'], unique=False)
+
+    op.drop_index('ix_borrowings_status_due', table_name='borrowings')
+    op.drop_index('ix_borrowings_user_status_due', table_name='borrowings')
+    op.drop_index('ix_borrowings_active_user_book', table_name='borrowings')
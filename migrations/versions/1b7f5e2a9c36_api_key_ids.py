@@ -0,0 +1,31 @@
+"""api_key_ids
+
+Revision ID: 1b7f5e2a9c36
+Revises: 0a9e4c7b2d58
+Create Date: 2026-10-19 18:12:40.664081
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7f5e2a9c36'
+down_revision: Union[str, None] = '0a9e4c7b2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing keys keep key_id NULL; their bcrypt hashes are converted on next use
+    op.add_column('user_keys', sa.Column('key_id', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_user_keys_key_id'), 'user_keys', ['key_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_keys_key_id'), table_name='user_keys')
+    op.drop_column('user_keys', 'key_id')
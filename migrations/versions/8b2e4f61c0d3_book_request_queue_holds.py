@@ -0,0 +1,48 @@
+"""book_request_queue_holds
+
+Revision ID: 8b2e4f61c0d3
+Revises: 76c19e6e02a8
+Create Date: 2026-10-19 11:02:17.533901
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4f61c0d3'
+down_revision: Union[str, None] = '76c19e6e02a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # book_request_queue was only ever created through metadata.create_all
+    if not sa.inspect(op.get_bind()).has_table('book_request_queue'):
+        op.create_table('book_request_queue',
+        sa.Column('request_id', sa.Integer(), nullable=False),
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('request_date', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('notification_sent', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['book_id'], ['books.book_id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+        sa.PrimaryKeyConstraint('request_id')
+        )
+        op.create_index(op.f('ix_book_request_queue_request_id'), 'book_request_queue', ['request_id'], unique=False)
+        op.create_index('idx_book_status_date', 'book_request_queue', ['book_id', 'status', 'request_date'], unique=False)
+
+    op.add_column('book_request_queue', sa.Column('reserved_at', sa.DateTime(), nullable=True))
+    op.add_column('book_request_queue', sa.Column('hold_expires_at', sa.DateTime(), nullable=True))
+    op.create_index('idx_status_hold_expires', 'book_request_queue', ['status', 'hold_expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_status_hold_expires', table_name='book_request_queue')
+    op.drop_column('book_request_queue', 'hold_expires_at')
+    op.drop_column('book_request_queue', 'reserved_at')
@@ -0,0 +1,42 @@
+"""unique_pending_request
+
+Revision ID: c47d0e93a5f1
+Revises: 8b2e4f61c0d3
+Create Date: 2026-10-19 11:48:05.617240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d0e93a5f1'
+down_revision: Union[str, None] = '8b2e4f61c0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # keep the oldest pending request per user and book, cancel any racing duplicates
+    op.execute("""
+        UPDATE book_request_queue q
+        SET status = 'CANCELLED'
+        WHERE q.status = 'PENDING'
+          AND EXISTS (
+              SELECT 1 FROM book_request_queue o
+              WHERE o.user_id = q.user_id
+                AND o.book_id = q.book_id
+                AND o.status = 'PENDING'
+                AND (o.request_date, o.request_id) < (q.request_date, q.request_id)
+          )
+    """)
+    op.create_index('uq_pending_user_book', 'book_request_queue', ['user_id', 'book_id'], unique=True,
+                    postgresql_where=sa.text("status = 'PENDING'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_pending_user_book', table_name='book_request_queue')
@@ -0,0 +1,52 @@
+"""loan_counters
+
+Revision ID: d5a8e2b71f94
+Revises: c47d0e93a5f1
+Create Date: 2026-10-19 14:02:37.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8e2b71f94'
+down_revision: Union[str, None] = 'c47d0e93a5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('active_loans', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('total_loans', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE users u
+        SET active_loans = b.loans
+        FROM (
+            SELECT user_id, count(*) AS loans
+            FROM borrowings
+            WHERE status IN ('borrowed', 'overdue')
+            GROUP BY user_id
+        ) b
+        WHERE b.user_id = u.user_id
+    """)
+    op.execute("""
+        UPDATE books k
+        SET total_loans = b.loans
+        FROM (
+            SELECT book_id, count(*) AS loans
+            FROM borrowings
+            GROUP BY book_id
+        ) b
+        WHERE b.book_id = k.book_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'total_loans')
+    op.drop_column('users', 'active_loans')
@@ -0,0 +1,118 @@
+"""partition_borrowings
+
+Revision ID: e2c6b9d40a17
+Revises: d5a8e2b71f94
+Create Date: 2026-10-19 15:21:09.530612
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6b9d40a17'
+down_revision: Union[str, None] = 'd5a8e2b71f94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _create_indexes(table: str) -> None:
+    op.create_index('ix_borrowings_book_id', table, ['book_id'], unique=False)
+    op.create_index('ix_borrowings_status', table, ['status'], unique=False)
+    op.create_index('ix_borrowings_user_id', table, ['user_id'], unique=False)
+
+
+def _drop_indexes(table: str) -> None:
+    op.drop_index('ix_borrowings_user_id', table_name=table)
+    op.drop_index('ix_borrowings_status', table_name=table)
+    op.drop_index('ix_borrowings_book_id', table_name=table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE borrowings SET borrow_date = now() WHERE borrow_date IS NULL")
+
+    _drop_indexes('borrowings')
+    op.execute("ALTER TABLE borrowings RENAME TO borrowings_unpartitioned")
+    op.execute("ALTER TABLE borrowings_unpartitioned RENAME CONSTRAINT borrowings_pkey TO borrowings_unpartitioned_pkey")
+
+    op.execute("""
+        CREATE TABLE borrowings (
+            borrowing_id INTEGER NOT NULL DEFAULT nextval('borrowings_borrowing_id_seq'),
+            user_id INTEGER REFERENCES users (user_id) ON DELETE CASCADE,
+            book_id INTEGER REFERENCES books (book_id) ON DELETE CASCADE,
+            borrow_date TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            due_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            return_date TIMESTAMP WITHOUT TIME ZONE,
+            status VARCHAR(20),
+            CONSTRAINT borrowings_pkey PRIMARY KEY (borrowing_id, borrow_date),
+            CONSTRAINT valid_return_date CHECK (return_date IS NULL OR return_date >= borrow_date)
+        ) PARTITION BY RANGE (borrow_date)
+    """)
+    op.execute("ALTER SEQUENCE borrowings_borrowing_id_seq OWNED BY borrowings.borrowing_id")
+    _create_indexes('borrowings')
+
+    # one partition per month that has loans, plus the next few months, and a default catch-all
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start date;
+            last_month date := date_trunc('month', now() + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            SELECT coalesce(date_trunc('month', min(borrow_date))::date, date_trunc('month', now())::date)
+            INTO month_start FROM borrowings_unpartitioned;
+
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF borrowings FOR VALUES FROM (%L) TO (%L)',
+                    'borrowings_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+                    month_start, (month_start + interval '1 month')::date
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE borrowings_default PARTITION OF borrowings DEFAULT")
+
+    op.execute("""
+        INSERT INTO borrowings (borrowing_id, user_id, book_id, borrow_date, due_date, return_date, status)
+        SELECT borrowing_id, user_id, book_id, borrow_date, due_date, return_date, status
+        FROM borrowings_unpartitioned
+    """)
+    op.drop_table('borrowings_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE borrowings RENAME TO borrowings_partitioned")
+    op.execute("ALTER TABLE borrowings_partitioned RENAME CONSTRAINT borrowings_pkey TO borrowings_partitioned_pkey")
+    _drop_indexes('borrowings_partitioned')
+
+    op.create_table('borrowings',
+    sa.Column('borrowing_id', sa.Integer(), server_default=sa.text("nextval('borrowings_borrowing_id_seq')"),
+              nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('book_id', sa.Integer(), nullable=True),
+    sa.Column('borrow_date', sa.DateTime(), nullable=True),
+    sa.Column('due_date', sa.DateTime(), nullable=False),
+    sa.Column('return_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.CheckConstraint('return_date IS NULL OR return_date >= borrow_date', name='valid_return_date'),
+    sa.ForeignKeyConstraint(['book_id'], ['books.book_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('borrowing_id')
+    )
+    op.execute("ALTER SEQUENCE borrowings_borrowing_id_seq OWNED BY borrowings.borrowing_id")
+    _create_indexes('borrowings')
+
+    # detached partitions are not copied back; reattach them first if their rows are needed
+    op.execute("""
+        INSERT INTO borrowings (borrowing_id, user_id, book_id, borrow_date, due_date, return_date, status)
+        SELECT borrowing_id, user_id, book_id, borrow_date, due_date, return_date, status
+        FROM borrowings_partitioned
+    """)
+    op.execute("DROP TABLE borrowings_partitioned CASCADE")
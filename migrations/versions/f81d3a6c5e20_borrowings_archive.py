@@ -0,0 +1,42 @@
+"""borrowings_archive
+
+Revision ID: f81d3a6c5e20
+Revises: e2c6b9d40a17
+Create Date: 2026-10-19 16:04:52.271943
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f81d3a6c5e20'
+down_revision: Union[str, None] = 'e2c6b9d40a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('borrowings_archive',
+    sa.Column('borrowing_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('book_id', sa.Integer(), nullable=True),
+    sa.Column('borrow_date', sa.DateTime(), nullable=False),
+    sa.Column('due_date', sa.DateTime(), nullable=False),
+    sa.Column('return_date', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('borrowing_id')
+    )
+    op.create_index(op.f('ix_borrowings_archive_book_id'), 'borrowings_archive', ['book_id'], unique=False)
+    op.create_index(op.f('ix_borrowings_archive_user_id'), 'borrowings_archive', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_borrowings_archive_user_id'), table_name='borrowings_archive')
+    op.drop_index(op.f('ix_borrowings_archive_book_id'), table_name='borrowings_archive')
+    op.drop_table('borrowings_archive')
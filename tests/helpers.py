@@ -0,0 +1,94 @@
+"""
+    Helpers shared by the database tests: seeded users and calling a route handler with its
+    dependencies filled in, the way FastAPI would once they are resolved.
+"""
+import asyncio
+import inspect
+from typing import Any, NamedTuple, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from pydantic.fields import FieldInfo
+
+from app.database import SessionLocal
+from app.schemas.borrowing import BorrowingCreate
+from app.schemas.user import UserCreate, UserToken
+from app.services.admin_services import AdminServices
+from app.services.borrowing_service import BorrowingService
+from app.services.user_service import UserService
+from app.utils.constants import USER_ACCESS_LEVEL
+from tests.query_counter import QueryCounter
+
+PASSWORD = "Budget-1234"
+
+
+class Patron(NamedTuple):
+    user_id: int
+    username: str
+    api_key: str
+    token: UserToken
+
+
+def make_user(suffix: str, role: int = USER_ACCESS_LEVEL) -> Patron:
+    user_data = UserCreate(username=f"budget_{suffix}", email=f"budget_{suffix}@example.com",
+                           first_name="Budget", last_name="User", password=PASSWORD)
+    db = SessionLocal()
+    try:
+        if role == USER_ACCESS_LEVEL:
+            user = asyncio.run(UserService(db).create_candidate_user(user_data))
+            api_key = user.api_key
+        else:
+            user = asyncio.run(AdminServices(db).add_staff(user_data))
+            api_key = ""
+        token = UserToken(username=user.username, email=user.email, first_name=user.first_name,
+                          last_name=user.last_name, user_id=user.user_id, role=role)
+        return Patron(user.user_id, user.username, api_key, token)
+    finally:
+        db.close()
+
+
+def borrow(patron: Patron, book_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return BorrowingService().borrow_book(db, patron.user_id, BorrowingCreate(book_id=book_id)).borrowing_id
+    finally:
+        db.close()
+
+
+def find_route(application, method: str, path: str) -> APIRoute:
+    for route in application.routes:
+        if isinstance(route, APIRoute) and route.path == path and method in route.methods:
+            return route
+    raise LookupError(f"No route {method} {path}")
+
+
+def call_route(application, method: str, path: str, **arguments) -> Tuple[Any, QueryCounter]:
+    """
+        Calls the handler the way FastAPI would once dependencies are resolved: db is a fresh
+        session, unset Query/Path/Header parameters take their defaults, and the result goes
+        through the response_model unless the handler already returned a Response.
+    """
+    route = find_route(application, method, path)
+    db = SessionLocal()
+    try:
+        for name, parameter in inspect.signature(route.endpoint).parameters.items():
+            if name == "db":
+                arguments[name] = db
+            elif name not in arguments and isinstance(parameter.default, FieldInfo) \
+                    and not parameter.default.is_required():
+                arguments[name] = parameter.default.get_default(call_default_factory=True)
+
+        with QueryCounter() as counter:
+            result = route.endpoint(**arguments)
+            if inspect.iscoroutine(result):
+                result = asyncio.run(result)
+            if route.response_model is not None and not isinstance(result, Response):
+                result = TypeAdapter(route.response_model).validate_python(result, from_attributes=True)
+        return result, counter
+    finally:
+        db.close()
+
+
+def login_request() -> Request:
+    return Request({"type": "http", "client": ("127.0.0.1", 0), "headers": []})
@@ -0,0 +1,45 @@
+import threading
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.database import engine as default_engine
+
+
+class QueryCounter:
+    """
+        Counts the statements an engine sends to the database while the block runs, using
+        the before_cursor_execute event. Only statements issued from the entering thread
+        are counted, so background workers sharing the engine do not skew the number.
+        Parameters are kept next to each statement so it can be replayed, e.g. under EXPLAIN.
+
+            with QueryCounter() as counter:
+                service.borrow_book(...)
+            assert counter.count <= 7, counter.statements
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or default_engine
+        self.statements: List[str] = []
+        self.parameters: List[Any] = []
+        self.__thread_id: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if threading.get_ident() == self.__thread_id:
+            self.statements.append(statement)
+            self.parameters.append(parameters)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        self.parameters = []
+        self.__thread_id = threading.get_ident()
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
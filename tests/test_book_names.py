@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.models import Author
+
+
+def test_concurrent_add_author_conflicts_instead_of_duplicating(migrated_database, suffix):
+    from app.database import SessionLocal
+    from app.services.book_service import BookService
+
+    name = f"Concurrent Author {suffix}"
+    service = BookService()
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # first holds the authors lock, as a batch that has not committed yet would
+        assert not service._lock_existing_names(first, Author, Author.author_id, [name])
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(service.add_author, second, name)
+            time.sleep(0.2)
+            assert not pending.done()
+
+            first.add(Author(name=name))
+            first.commit()
+            with pytest.raises(HTTPException) as raised:
+                pending.result(timeout=5)
+
+        assert raised.value.status_code == 409
+        assert first.query(Author).filter(Author.name == name).count() == 1
+    finally:
+        first.rollback()
+        first.close()
+        second.close()
@@ -0,0 +1,100 @@
+"""
+    The hot borrowing queries must be served by the indexes added for them, not just by any
+    index on borrowings. Service queries are captured as they are sent and EXPLAINed with
+    enable_seqscan off; every borrowings scan, including the Bitmap Index Scans under a Bitmap
+    Heap Scan, has to read one of the named indexes or their per-partition copies.
+"""
+from typing import Iterator, List, Set, Tuple
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import Borrowing
+from app.services.borrowing_service import BorrowingService
+from app.utils.constants import ACTIVE_BORROWING_STATUSES
+from tests.query_counter import QueryCounter
+
+
+def index_family(db: Session, index_name: str) -> Set[str]:
+    """The index itself plus the copies Postgres created for it on every partition."""
+    children = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": index_name}).scalars()
+    return {index_name, *children}
+
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+
+def plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def scan_indexes(scan: dict) -> Set[str]:
+    """Indexes a scan reads; a Bitmap Heap Scan names them on its Bitmap Index Scan children."""
+    return {node["Index Name"] for node in plan_nodes(scan) if "Index Name" in node}
+
+
+def borrowings_scans(db: Session, statement: str, parameters) -> List[Tuple[str, Set[str]]]:
+    """(node type, indexes read) of every borrowings scan in the statement's plan."""
+    connection = db.connection()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    (plan,) = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar_one()
+    return [
+        (node["Node Type"], scan_indexes(node))
+        for node in plan_nodes(plan["Plan"])
+        if node.get("Relation Name", "").startswith("borrowings")
+    ]
+
+
+def assert_uses_index(db: Session, counter: QueryCounter, *index_names: str) -> None:
+    """Every borrowings scan is an index or bitmap scan that reads one of index_names (or its partition copies)."""
+    family = set()
+    for index_name in index_names:
+        assert db.execute(text("SELECT to_regclass(:name)"), {"name": index_name}).scalar(), f"{index_name} is missing"
+        family |= index_family(db, index_name)
+    borrowings_statements = [(statement, parameters) for statement, parameters
+                             in zip(counter.statements, counter.parameters) if "FROM borrowings" in statement]
+    assert borrowings_statements, "no query on borrowings was captured"
+    for statement, parameters in borrowings_statements:
+        scans = borrowings_scans(db, statement, parameters)
+        assert scans, statement
+        assert all(node_type in INDEX_SCANS and indexes & family for node_type, indexes in scans), (index_names, scans)
+
+
+@pytest.mark.parametrize("past_limit", [None, 5])
+def test_user_borrowings_use_user_status_due_index(db, past_limit):
+    with QueryCounter(db.get_bind()) as counter:
+        BorrowingService().get_user_borrowings(db, user_id=1, past_limit=past_limit)
+    assert_uses_index(db, counter, "ix_borrowings_user_status_due")
+
+
+def test_overdue_sweep_uses_status_due_index(db):
+    with QueryCounter(db.get_bind()) as counter:
+        BorrowingService().update_overdue_status(db)
+    assert_uses_index(db, counter, "ix_borrowings_status_due")
+
+
+def test_duplicate_loan_check_uses_user_index(db):
+    # the same query borrow_book runs once the user's row is locked; the planner may pick the
+    # partial (user_id, book_id) index or the (user_id, status) composite, and may combine either
+    # with ix_borrowings_book_id in a bitmap, but a book_id-only plan scans every loan of the book
+    with QueryCounter(db.get_bind()) as counter:
+        db.query(Borrowing.borrowing_id).filter(
+            Borrowing.user_id == 1,
+            Borrowing.book_id == 1,
+            Borrowing.status.in_(ACTIVE_BORROWING_STATUSES)
+        ).first()
+    assert_uses_index(db, counter, "ix_borrowings_active_user_book", "ix_borrowings_user_status_due")
+
+
+def test_partial_index_predicate_matches_active_statuses(db):
+    predicate = db.execute(text(
+        "SELECT pg_get_expr(i.indpred, i.indrelid) FROM pg_index i "
+        "WHERE i.indexrelid = to_regclass('ix_borrowings_active_user_book')"
+    )).scalar_one()
+    assert all(f"'{status}'" in predicate for status in ACTIVE_BORROWING_STATUSES), predicate
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.hashing_executor import HashingExecutor
+
+
+def test_cancelled_queued_job_gives_its_slot_back():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run_async(release.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run_async(lambda: "queued"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as rejected:
+            executor.submit(lambda: None)
+        assert rejected.value.status_code == 503
+
+        queued.cancel()
+        await asyncio.sleep(0.05)
+        assert executor.snapshot()["queued"] == 0
+
+        # the cancelled job's slot is free again
+        replacement = asyncio.ensure_future(executor.run_async(lambda: "replacement"))
+        release.set()
+        await running
+        assert await replacement == "replacement"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+    snapshot = executor.snapshot()
+    assert (snapshot["queued"], snapshot["running"]) == (0, 0)
+    assert snapshot["completed"] == 2
@@ -0,0 +1,183 @@
+"""
+    Query-count budget per route, to catch N+1 and stray lazy-load regressions.
+
+    Each test prepares its data outside the count, then calls the route handler with its
+    dependencies filled in and serializes the result through the route's response_model,
+    where lazy relationships would load. Every statement the handler sends is counted, and
+    the budgets are the counts measured on Postgres when they were last tightened.
+"""
+from typing import List
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.database import SessionLocal
+from app.schemas.auth import LoginCredentials
+from app.schemas.book import BookCreate, BookAuthorCreate, BookUpdate
+from app.schemas.borrowing import BorrowingCreate, BorrowingBulkCreate, BorrowingBulkReturn
+from app.schemas.token import RefreshToken
+from app.schemas.user import UserCreate, UserPasswordUpdate, UserUpdate
+from app.services.book_service import BookService
+from app.services.borrowing_service import BorrowingService
+from tests.helpers import PASSWORD, borrow, call_route, login_request, make_user
+from tests.query_counter import QueryCounter
+
+
+@pytest.fixture
+def book_ids(app, suffix) -> List[int]:
+    db = SessionLocal()
+    try:
+        book_service = BookService()
+        author = book_service.add_author(db, name=f"Budget Author {suffix}")
+        return [
+            book_service.add_book(db, BookCreate(
+                isbn=f"97{suffix}{index}", title=f"Budget Book {index}", total_copies=5 if index else 1,
+                authors=[BookAuthorCreate(author_id=author.author_id)]
+            )).book_id
+            for index in range(3)
+        ]
+    finally:
+        db.close()
+
+
+def assert_within(counter: QueryCounter, budget: int) -> None:
+    assert counter.count <= budget, "\n".join(
+        [f"{counter.count} queries, budget {budget}:"] + [" ".join(s.split())[:160] for s in counter.statements]
+    )
+
+
+def test_register(app, suffix):
+    _, counter = call_route(app, "POST", "/api/user/register", user_data=UserCreate(
+        username=f"budget2_{suffix}", email=f"budget2_{suffix}@example.com",
+        first_name="Budget", last_name="Second", password=PASSWORD
+    ))
+    assert_within(counter, 2)
+
+
+def test_user_login(app, patron):
+    _, counter = call_route(app, "POST", "/api/user/login", request=login_request(), api_key=patron.api_key,
+                            login_creds=LoginCredentials(username=patron.username, password=PASSWORD))
+    assert_within(counter, 2)
+
+
+def test_staff_login(app, librarian):
+    _, counter = call_route(app, "POST", "/api/auth/login", request=login_request(),
+                            user_data=LoginCredentials(username=librarian.username, password=PASSWORD))
+    assert_within(counter, 1)
+
+
+def test_refresh(app, patron):
+    tokens, _ = call_route(app, "POST", "/api/user/login", request=login_request(), api_key=patron.api_key,
+                           login_creds=LoginCredentials(username=patron.username, password=PASSWORD))
+    _, counter = call_route(app, "POST", "/api/auth/refresh", data=RefreshToken(refresh_token=tokens.refresh_token))
+    assert_within(counter, 1)
+
+
+def test_reset_key(app, patron):
+    _, counter = call_route(app, "POST", "/api/user/reset-key/{username}", username=patron.username)
+    assert_within(counter, 3)
+
+
+def test_update_user_details(app, patron):
+    _, counter = call_route(app, "PATCH", "/api/user/", data=UserUpdate(first_name="Renamed", last_name="User"),
+                            api_key=patron.api_key, current_user=patron.token)
+    assert_within(counter, 3)
+
+
+def test_update_password(app, patron):
+    _, counter = call_route(app, "PATCH", "/api/user/reset/password", api_key=patron.api_key,
+                            data=UserPasswordUpdate(current_password=PASSWORD, new_password="Budget-5678"),
+                            current_user=patron.token)
+    assert_within(counter, 5)
+
+
+def test_get_book(app, book_ids):
+    BookService().invalidate_book_cache(book_ids[0])
+    _, counter = call_route(app, "GET", "/api/book/{book_id}", book_id=book_ids[0], _=None)
+    assert_within(counter, 1)
+
+
+def test_update_book(app, book_ids, librarian):
+    _, counter = call_route(app, "PUT", "/api/book/{book_id}", book_id=book_ids[1],
+                            book_data=BookUpdate(title="Renamed Budget Book"), _=librarian.token)
+    assert_within(counter, 3)
+
+
+def test_list_books(app, book_ids, patron):
+    _, counter = call_route(app, "GET", "/api/book/", _=patron.token)
+    assert_within(counter, 2)
+
+
+def test_borrow(app, book_ids, patron):
+    # both borrow budgets include the one-off overdue counter seed on the user's first borrow
+    _, counter = call_route(app, "POST", "/api/borrow/", borrowing_data=BorrowingCreate(book_id=book_ids[1]),
+                            current_user=patron.token)
+    assert_within(counter, 11)
+
+
+def test_borrow_unavailable_joins_queue(app, book_ids, patron, suffix):
+    borrow(make_user(f"other_{suffix}"), book_ids[0])
+    db = SessionLocal()
+    try:
+        with QueryCounter() as counter, pytest.raises(HTTPException) as raised:
+            BorrowingService().borrow_book(db, patron.user_id, BorrowingCreate(book_id=book_ids[0]))
+    finally:
+        db.close()
+    assert raised.value.status_code == 400
+    assert_within(counter, 5)
+
+
+def test_bulk_borrow(app, book_ids, patron):
+    _, counter = call_route(app, "POST", "/api/borrow/bulk", borrowing_data=BorrowingBulkCreate(book_ids=book_ids[1:]),
+                            current_user=patron.token)
+    assert_within(counter, 11)
+
+
+def test_get_borrowing(app, book_ids, patron):
+    borrowing_id = borrow(patron, book_ids[1])
+    _, counter = call_route(app, "GET", "/api/borrow/{borrowing_id}", borrowing_id=borrowing_id, _=patron.token)
+    assert_within(counter, 1)
+
+
+def test_my_borrowings(app, book_ids, patron):
+    borrow(patron, book_ids[1])
+    _, counter = call_route(app, "GET", "/api/borrow/users/me/borrowings", current_user=patron.token)
+    assert_within(counter, 1)
+
+
+def test_book_borrowings(app, book_ids, patron, librarian):
+    borrow(patron, book_ids[1])
+    _, counter = call_route(app, "GET", "/api/borrow/books/{book_id}/borrowings", book_id=book_ids[1],
+                            _=librarian.token)
+    assert_within(counter, 2)
+
+
+def test_list_borrowings(app, book_ids, patron, librarian):
+    borrow(patron, book_ids[1])
+    _, counter = call_route(app, "GET", "/api/borrow/", user_id=patron.user_id, _=librarian.token)
+    assert_within(counter, 2)
+
+
+def test_return(app, book_ids, patron):
+    borrowing_id = borrow(patron, book_ids[1])
+    _, counter = call_route(app, "PUT", "/api/borrow/{borrowing_id}/return", borrowing_id=borrowing_id,
+                            background_tasks=BackgroundTasks(), _=patron.token)
+    assert_within(counter, 13)
+
+
+def test_bulk_return(app, book_ids, patron):
+    borrowing_ids = [borrow(patron, book_id) for book_id in book_ids[1:]]
+    _, counter = call_route(app, "PUT", "/api/borrow/bulk/return",
+                            return_data=BorrowingBulkReturn(borrowing_ids=borrowing_ids), current_user=patron.token)
+    assert_within(counter, 8)
+
+
+def test_list_users(app, admin):
+    _, counter = call_route(app, "GET", "/api/admin/users", limit=20, _=admin)
+    assert_within(counter, 2)
+
+
+def test_reassign_role(app, patron, admin):
+    _, counter = call_route(app, "PUT", "/api/admin/user/{user_id}/reassign-role", user_id=patron.user_id,
+                            current_user=admin)
+    assert_within(counter, 3)
@@ -0,0 +1,74 @@
+"""Changes to an account end the sessions opened before them, access tokens included."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.database import SessionLocal
+from app.schemas.auth import LoginCredentials
+from app.schemas.user import UserPasswordUpdate
+from app.security.middleware_helper import MiddlewareHelper
+from app.services.admin_services import AdminServices
+from app.services.user_service import UserService
+from tests.helpers import PASSWORD, Patron, call_route, login_request
+
+
+def login(app, patron: Patron, password: str = PASSWORD) -> str:
+    tokens, _ = call_route(app, "POST", "/api/user/login", request=login_request(), api_key=patron.api_key,
+                           login_creds=LoginCredentials(username=patron.username, password=password))
+    return tokens.access_token
+
+
+def assert_revoked(access_token: str) -> None:
+    with pytest.raises(HTTPException) as raised:
+        MiddlewareHelper().validate_token(access_token)
+    assert raised.value.status_code == 401
+
+
+def test_role_change_revokes_issued_access_tokens(app, patron):
+    access_token = login(app, patron)
+    MiddlewareHelper().validate_token(access_token)
+
+    db = SessionLocal()
+    try:
+        AdminServices(db).reassign_user_role(user_id=patron.user_id)
+    finally:
+        db.close()
+
+    assert_revoked(access_token)
+
+
+def test_password_change_revokes_issued_access_tokens(app, patron):
+    access_token = login(app, patron)
+
+    db = SessionLocal()
+    try:
+        asyncio.run(UserService(db).update_user_password(
+            user_id=patron.user_id, api_key=patron.api_key,
+            update_password=UserPasswordUpdate(current_password=PASSWORD, new_password="Changed-5678")
+        ))
+    finally:
+        db.close()
+
+    assert_revoked(access_token)
+    # a login after the change gets a token issued after the cut-off
+    MiddlewareHelper().validate_token(login(app, patron, password="Changed-5678"))
+
+
+def test_role_removal_falls_back_to_user_role_and_revokes(app, librarian):
+    tokens, _ = call_route(app, "POST", "/api/auth/login", request=login_request(),
+                           user_data=LoginCredentials(username=librarian.username, password=PASSWORD))
+
+    db = SessionLocal()
+    try:
+        service = AdminServices(db)
+        with pytest.raises(HTTPException) as raised:
+            service.remove_role(librarian.user_id, "admin")
+        assert raised.value.status_code == 400
+
+        user = service.remove_role(librarian.user_id, "librarian")
+        assert service.has_role(user, "user")
+    finally:
+        db.close()
+
+    assert_revoked(tokens.access_token)